@@ -0,0 +1,210 @@
+"""
+规则化警报引擎
+
+规则可限定事件、平台和事件类别，支持三种类型：
+  threshold        极化指数超过阈值
+  rate_of_change   两次评估之间极化指数的增量超过阈值
+  forecast_breach  预测的极化指数超过阈值
+
+规则与当前的序列集合编译为评估计划（规则×序列的矩阵），每次评估对全部序列向量化计算。
+每个 (规则, 序列) 只在从未触发变为触发时产生一条警报；指标回落到
+threshold - hysteresis 以下才解除，避免持续超限或在阈值附近波动时刷屏。
+"""
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, validator
+
+RULE_KINDS = ("threshold", "rate_of_change", "forecast_breach")
+
+SeriesKey = Tuple[str, str]
+
+
+class AlertRule(BaseModel):
+    rule_id: str
+    kind: str = "threshold"
+    event_id: Optional[str] = None  # None表示任意事件
+    platform: Optional[str] = None  # None表示任意平台
+    category: Optional[str] = None  # None表示任意类别
+    threshold: float
+    hysteresis: float = 0.05  # 指标低于 threshold - hysteresis 时解除警报
+    description: Optional[str] = None
+
+    @validator("kind")
+    def check_kind(cls, v):
+        if v not in RULE_KINDS:
+            raise ValueError(f"kind必须是 {', '.join(RULE_KINDS)} 之一")
+        return v
+
+    @validator("hysteresis")
+    def check_hysteresis(cls, v):
+        if v < 0:
+            raise ValueError("hysteresis不能为负数")
+        return v
+
+
+class EvaluationPlan:
+    """规则在特定序列集合上的编译结果"""
+
+    def __init__(self, rules: List[AlertRule], keys: List[SeriesKey], categories: Dict[str, str]):
+        self.rules = rules
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+        events = np.array([k[0] for k in keys], dtype=object)
+        platforms = np.array([k[1] for k in keys], dtype=object)
+        series_categories = np.array([categories.get(k[0]) for k in keys], dtype=object)
+
+        self.kind = np.array([RULE_KINDS.index(r.kind) for r in rules], dtype=np.int64)
+        self.trigger = np.array([r.threshold for r in rules], dtype=np.float64)
+        self.clear = self.trigger - np.array([r.hysteresis for r in rules], dtype=np.float64)
+
+        applicable = np.ones((len(rules), len(keys)), dtype=bool)
+        for i, rule in enumerate(rules):
+            if rule.event_id is not None:
+                applicable[i] &= events == rule.event_id
+            if rule.platform is not None:
+                applicable[i] &= platforms == rule.platform
+            if rule.category is not None:
+                applicable[i] &= series_categories == rule.category
+        self.applicable = applicable
+        # 需要预测值的序列
+        forecast_rules = self.kind == RULE_KINDS.index("forecast_breach")
+        self.needs_forecast = applicable[forecast_rules].any(axis=0) if forecast_rules.any() \
+            else np.zeros(len(keys), dtype=bool)
+        self.active = np.zeros((len(rules), len(keys)), dtype=bool)
+
+    def evaluate(self, metrics: np.ndarray):
+        """
+        metrics 形状为 (规则类型数, 序列数)，缺失值为NaN
+
+        返回新触发和新解除的 (规则下标, 序列下标) 数组。
+        """
+        values = metrics[self.kind]
+        with np.errstate(invalid="ignore"):
+            breach = (values > self.trigger[:, None]) & self.applicable
+            cleared = values < self.clear[:, None]
+        active = np.where(self.active, ~cleared, breach)
+        fired = np.argwhere(active & ~self.active)
+        resolved = np.argwhere(self.active & ~active)
+        self.active = active
+        return fired, resolved
+
+
+class AlertEngine:
+    """警报引擎：管理规则、编译评估计划并维护未解除的警报"""
+
+    def __init__(self):
+        self._rules: Dict[str, AlertRule] = {}
+        self._rules_version = 0
+        self._plan: Optional[EvaluationPlan] = None
+        self._plan_version = -1
+        self._previous: Dict[SeriesKey, float] = {}
+        # 未解除的警报：(rule_id, 序列) -> 警报记录
+        self._open: Dict[Tuple[str, SeriesKey], dict] = {}
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    @property
+    def rules(self) -> List[AlertRule]:
+        return list(self._rules.values())
+
+    def set_rule(self, rule: AlertRule) -> None:
+        """新增或替换规则；替换时该规则下未解除的警报保持不变"""
+        with self._lock:
+            self._rules[rule.rule_id] = rule
+            self._rules_version += 1
+
+    def remove_rule(self, rule_id: str) -> bool:
+        with self._lock:
+            if self._rules.pop(rule_id, None) is None:
+                return False
+            self._open = {k: v for k, v in self._open.items() if k[0] != rule_id}
+            self._rules_version += 1
+            return True
+
+    def open_alerts(self) -> List[dict]:
+        return list(self._open.values())
+
+    def _compile(self, keys: List[SeriesKey], categories: Callable[[], Dict[str, str]]) -> EvaluationPlan:
+        rules = list(self._rules.values())
+        plan = EvaluationPlan(rules, keys, categories() if rules else {})
+        # 从未解除的警报恢复触发状态
+        rule_index = {r.rule_id: i for i, r in enumerate(rules)}
+        for rule_id, key in self._open:
+            if rule_id in rule_index and key in plan.index:
+                plan.active[rule_index[rule_id], plan.index[key]] = True
+        self._plan = plan
+        self._plan_version = self._rules_version
+        return plan
+
+    def evaluate(self, series: Dict[SeriesKey, float],
+                 categories: Callable[[], Dict[str, str]],
+                 forecast: Optional[Callable[[str], Optional[float]]] = None,
+                 now: Optional[datetime] = None) -> Tuple[List[dict], List[dict]]:
+        """
+        评估一次全部序列
+
+        series 为 {(事件ID, 平台): 极化指数}；categories 返回 {事件ID: 类别}，
+        只在重新编译时调用；forecast(事件ID) 返回预测的极化指数。
+        返回 (新触发的警报, 本次解除的警报)。
+        """
+        now = now or datetime.now()
+        with self._lock:
+            keys = list(series)
+            plan = self._plan
+            if plan is None or self._plan_version != self._rules_version or plan.keys != keys:
+                plan = self._compile(keys, categories)
+
+            values = np.fromiter(series.values(), dtype=np.float64, count=len(keys))
+            previous = np.array([self._previous.get(k, np.nan) for k in keys], dtype=np.float64)
+            forecasts = np.full(len(keys), np.nan)
+            if forecast is not None:
+                for i in np.flatnonzero(plan.needs_forecast):
+                    predicted = forecast(keys[i][0])
+                    if predicted is not None:
+                        forecasts[i] = predicted
+            metrics = np.vstack([values, values - previous, forecasts])
+            self._previous = dict(series)
+
+            fired, resolved = plan.evaluate(metrics)
+            fired_alerts = []
+            for r, s in fired:
+                rule, key = plan.rules[r], keys[s]
+                alert = self._new_alert(rule, key, float(metrics[plan.kind[r], s]), now)
+                self._open[(rule.rule_id, key)] = alert
+                fired_alerts.append(alert)
+            resolved_alerts = []
+            for r, s in resolved:
+                alert = self._open.pop((plan.rules[r].rule_id, keys[s]), None)
+                if alert is not None:
+                    alert["status"] = "已解除"
+                    alert["resolved_at"] = now
+                    resolved_alerts.append(alert)
+            return fired_alerts, resolved_alerts
+
+    def _new_alert(self, rule: AlertRule, key: SeriesKey, value: float, now: datetime) -> dict:
+        self._counter += 1
+        event_id, platform = key
+        scope = "" if event_id == "*" else f"事件{event_id}"
+        if platform != "all":
+            scope += f"{platform}平台"
+        if rule.kind == "threshold":
+            text = f"{scope}极化指数({value:.2f})超过警报阈值({rule.threshold:.2f})"
+        elif rule.kind == "rate_of_change":
+            text = f"{scope}极化指数上升幅度({value:.2f})超过阈值({rule.threshold:.2f})"
+        else:
+            text = f"{scope}预测极化指数({value:.2f})将超过警报阈值({rule.threshold:.2f})"
+        return {
+            "alert_id": f"alt_{self._counter}",
+            "rule_id": rule.rule_id,
+            "kind": rule.kind,
+            "event_id": event_id,
+            "platform": platform,
+            "timestamp": now,
+            "pi_value": value,
+            "threshold": rule.threshold,
+            "status": "已触发",
+            "description": rule.description or text
+        }
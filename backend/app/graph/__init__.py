@@ -0,0 +1,3 @@
+# 评论互动图包初始化文件
+from app.graph.builder import InteractionGraph, build_interaction_graph
+from app.graph.service import get_event_graph, network_view
@@ -0,0 +1,131 @@
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# 评论内容中的 @用户 提及
+MENTION_PATTERN = re.compile(r"@([^\s@:：,，。!！?？]+)")
+
+# 字符串形式的情感标签对应的立场值
+SENTIMENT_VALUES = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
+
+
+class InteractionGraph:
+    """
+    评论互动图（无向加权图，CSR邻接表示）
+
+    indptr/indices/weights 为标准CSR数组，节点i的邻居为
+    indices[indptr[i]:indptr[i+1]]；stance为每个节点的平均立场（-1~1）。
+    """
+
+    def __init__(self, users: List[str], indptr: np.ndarray, indices: np.ndarray,
+                 weights: np.ndarray, stance: np.ndarray):
+        self.users = users
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.stance = stance
+
+    @property
+    def node_count(self) -> int:
+        return len(self.users)
+
+    @property
+    def edge_count(self) -> int:
+        """无向边数量（CSR中每条边存储两次）"""
+        return len(self.indices) // 2
+
+    def rows(self) -> np.ndarray:
+        """每条CSR边对应的起点"""
+        return np.repeat(np.arange(self.node_count, dtype=np.int64), np.diff(self.indptr))
+
+    def degree(self) -> np.ndarray:
+        """加权度"""
+        return np.bincount(self.rows(), weights=self.weights, minlength=self.node_count)
+
+
+def csr_from_edges(n: int, src: np.ndarray, dst: np.ndarray):
+    """由有向边列表构造对称的CSR数组，重复边合并为权重"""
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    keep = src != dst
+    src, dst = src[keep], dst[keep]
+
+    keys = np.concatenate([src * n + dst, dst * n + src])
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    weights = np.bincount(inverse, minlength=len(uniq)).astype(np.float64)
+    rows = uniq // n
+    indices = (uniq % n).astype(np.int32)
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, indices, weights
+
+
+def comment_stance(comment: dict) -> Optional[float]:
+    """读取评论立场：优先使用stance字段，其次sentiment（数值或情感标签）"""
+    value = comment.get("stance")
+    if value is None:
+        value = comment.get("sentiment")
+    if isinstance(value, str):
+        return SENTIMENT_VALUES.get(value)
+    if isinstance(value, (int, float)):
+        return max(-1.0, min(1.0, float(value)))
+    return None
+
+
+def _comment_author(comment: dict) -> str:
+    """评论作者标识；没有作者字段时每条评论视为独立节点"""
+    for key in ("userId", "user", "author"):
+        if comment.get(key):
+            return str(comment[key])
+    return f"comment:{comment.get('id')}"
+
+
+def build_interaction_graph(comments: List[dict]) -> InteractionGraph:
+    """
+    从评论数据构建用户互动图
+
+    回复（replyTo/parentId 指向的评论作者）和内容中的 @提及 均视为一次互动。
+    """
+    user_index: Dict[str, int] = {}
+    comment_author: Dict[str, int] = {}
+    stance_sum: List[float] = []
+    stance_count: List[int] = []
+
+    def node_of(user: str) -> int:
+        idx = user_index.get(user)
+        if idx is None:
+            idx = len(user_index)
+            user_index[user] = idx
+            stance_sum.append(0.0)
+            stance_count.append(0)
+        return idx
+
+    authors = []
+    for comment in comments:
+        author = node_of(_comment_author(comment))
+        authors.append(author)
+        comment_author[str(comment.get("id"))] = author
+        stance = comment_stance(comment)
+        if stance is not None:
+            stance_sum[author] += stance
+            stance_count[author] += 1
+
+    src: List[int] = []
+    dst: List[int] = []
+    for comment, author in zip(comments, authors):
+        parent = comment.get("replyTo", comment.get("parentId"))
+        if parent is not None and str(parent) in comment_author:
+            src.append(author)
+            dst.append(comment_author[str(parent)])
+        for name in MENTION_PATTERN.findall(comment.get("content") or ""):
+            src.append(author)
+            dst.append(node_of(name))
+
+    n = len(user_index)
+    indptr, indices, weights = csr_from_edges(n, np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64))
+    counts = np.array(stance_count, dtype=np.float64)
+    stance = np.divide(np.array(stance_sum, dtype=np.float64), counts,
+                       out=np.zeros(n, dtype=np.float64), where=counts > 0)
+    return InteractionGraph(list(user_index), indptr, indices, weights, stance)
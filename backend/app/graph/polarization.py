@@ -0,0 +1,153 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.graph.builder import InteractionGraph
+
+
+def label_propagation(graph: InteractionGraph, max_iter: int = 20, seed: int = 0,
+                      tolerance: float = 1e-3) -> np.ndarray:
+    """
+    标签传播社区发现（半同步、向量化实现）
+
+    每轮按邻居标签的权重和为每个节点选出最优标签，随机更新一半节点以避免振荡；
+    返回从0开始连续编号的社区标签。
+    """
+    n = graph.node_count
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    rows = graph.rows()
+    labels = np.arange(n, dtype=np.int64)
+
+    for _ in range(max_iter):
+        if len(rows) == 0:
+            break
+        keys = rows * n + labels[graph.indices]
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        # 微小随机扰动用于打破平局
+        scores = np.bincount(inverse, weights=graph.weights, minlength=len(uniq))
+        scores += rng.random(len(uniq)) * 1e-6
+        node = uniq // n
+        # uniq按(节点, 标签)有序，逐节点取得分最高的标签
+        starts = np.flatnonzero(np.r_[True, node[1:] != node[:-1]])
+        best_score = np.maximum.reduceat(scores, starts)
+        candidates = np.flatnonzero(scores == np.repeat(best_score, np.diff(np.r_[starts, len(uniq)])))
+        candidates = candidates[np.r_[True, node[candidates[1:]] != node[candidates[:-1]]]]
+        best_nodes = node[candidates]
+        best_labels = uniq[candidates] % n
+
+        unstable = labels[best_nodes] != best_labels
+        if np.count_nonzero(unstable) <= tolerance * n:
+            break
+        update = unstable & (rng.random(len(best_nodes)) < 0.5)
+        labels[best_nodes[update]] = best_labels[update]
+
+    _, labels = np.unique(labels, return_inverse=True)
+    return labels
+
+
+def modularity(graph: InteractionGraph, labels: np.ndarray) -> float:
+    """加权模块度 Q = Σ_c [L_c/m - (d_c/2m)^2]"""
+    total = graph.weights.sum()  # 对称存储，等于2m
+    if total == 0:
+        return 0.0
+    rows = graph.rows()
+    intra = graph.weights[labels[rows] == labels[graph.indices]].sum()
+    community_degree = np.bincount(labels, weights=graph.degree())
+    return float(intra / total - np.sum((community_degree / total) ** 2))
+
+
+def _propagate(graph: InteractionGraph, rows: np.ndarray, transition: np.ndarray,
+               mass: np.ndarray) -> np.ndarray:
+    """随机游走一步：mass_{t+1} = mass_t · P"""
+    return np.bincount(graph.indices, weights=mass[rows] * transition, minlength=graph.node_count)
+
+
+def random_walk_controversy(graph: InteractionGraph, side: np.ndarray, top_k: Optional[int] = None,
+                            max_steps: int = 100, tol: float = 1e-3) -> Optional[float]:
+    """
+    随机游走争议度（RWC）
+
+    side 取值 +1/-1/0 表示节点所属阵营（0为不属于任何阵营）。
+    从某一阵营随机的非吸收节点出发的游走被两侧各自度最高的 top_k 个节点吸收，
+    RWC = P(X|X)·P(Y|Y) - P(Y|X)·P(X|Y)，取值范围[-1, 1]，越大越极化。
+    未被吸收的残余概率（不超过tol或达到max_steps）不计入结果。
+    两侧任一为空、任一侧全部是吸收节点或图中没有边时返回None。
+    """
+    n = graph.node_count
+    sides = [np.flatnonzero(side > 0), np.flatnonzero(side < 0)]
+    if n == 0 or len(graph.indices) == 0 or any(len(s) == 0 for s in sides):
+        return None
+
+    degree = graph.degree()
+    rows = graph.rows()
+    transition = np.divide(graph.weights, degree[rows], out=np.zeros_like(graph.weights),
+                           where=degree[rows] > 0)
+
+    absorbing = []
+    for members in sides:
+        k = top_k or max(1, min(100, len(members) // 100))
+        k = min(k, len(members))
+        absorbing.append(members[np.argsort(-degree[members], kind="stable")[:k]])
+    absorbing_mask = np.zeros(n, dtype=bool)
+    absorbing_mask[np.concatenate(absorbing)] = True
+    # 吸收节点本身不作为起点，否则起点即被吸收，结果偏向本阵营
+    starts = [members[~absorbing_mask[members]] for members in sides]
+    if any(len(s) == 0 for s in starts):
+        return None
+
+    # end_prob[i][j]: 从阵营i出发被阵营j吸收的概率
+    end_prob = np.zeros((2, 2))
+    for i, members in enumerate(starts):
+        mass = np.zeros(n)
+        mass[members] = 1.0 / len(members)
+        absorbed = np.zeros(2)
+        for _ in range(max_steps):
+            absorbed += [mass[absorbing[0]].sum(), mass[absorbing[1]].sum()]
+            mass[absorbing_mask] = 0.0
+            if mass.sum() < tol:
+                break
+            mass = _propagate(graph, rows, transition, mass)
+        if absorbed.sum() > 0:
+            end_prob[i] = absorbed / absorbed.sum()
+
+    return float(end_prob[0, 0] * end_prob[1, 1] - end_prob[0, 1] * end_prob[1, 0])
+
+
+def partition_sides(graph: InteractionGraph, labels: np.ndarray) -> np.ndarray:
+    """划分阵营：优先按节点立场，没有对立立场时取最大的两个社区"""
+    side = np.sign(graph.stance).astype(np.int8)
+    if (side > 0).any() and (side < 0).any():
+        return side
+    side = np.zeros(graph.node_count, dtype=np.int8)
+    sizes = np.bincount(labels) if len(labels) else np.zeros(0, dtype=np.int64)
+    if len(sizes) >= 2:
+        largest = np.argsort(-sizes, kind="stable")[:2]
+        side[labels == largest[0]] = 1
+        side[labels == largest[1]] = -1
+    return side
+
+
+def polarization_summary(graph: InteractionGraph, labels: np.ndarray, side: np.ndarray) -> Dict:
+    """汇总互动图的社区结构与极化指标"""
+    sizes = np.bincount(labels) if len(labels) else np.zeros(0, dtype=np.int64)
+    rows = graph.rows()
+    cross = (side[rows].astype(np.int64) * side[graph.indices]) < 0
+    sided = (side[rows] != 0) & (side[graph.indices] != 0)
+    sided_weight = graph.weights[sided].sum()
+
+    return {
+        "nodeCount": graph.node_count,
+        "edgeCount": graph.edge_count,
+        "communityCount": int(len(sizes)),
+        "largestCommunities": sorted((int(s) for s in sizes), reverse=True)[:10],
+        "modularity": modularity(graph, labels),
+        "randomWalkControversy": random_walk_controversy(graph, side),
+        "crossSideEdgeRatio": float(graph.weights[cross].sum() / sided_weight) if sided_weight > 0 else None,
+        "sideSizes": {
+            "support": int((side > 0).sum()),
+            "oppose": int((side < 0).sum()),
+            "neutral": int((side == 0).sum())
+        },
+    }
@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.graph.builder import InteractionGraph, build_interaction_graph
+from app.metrics import record_cache
+from app.profiling import span
+from app.graph.polarization import label_propagation, partition_sides, polarization_summary
+from app.storage import get_storage
+
+# 最多缓存的事件图数量
+CACHE_SIZE = 8
+
+SIDE_NAMES = {1: "支持", -1: "反对", 0: "中立"}
+
+
+class EventGraph:
+    """某一版本评论数据对应的互动图及分析结果"""
+
+    def __init__(self, event_id: int, version: str, graph: InteractionGraph,
+                 labels: np.ndarray, side: np.ndarray, summary: Dict):
+        self.event_id = event_id
+        self.version = version
+        self.graph = graph
+        self.labels = labels
+        self.side = side
+        self.summary = summary
+
+
+_cache: "OrderedDict[int, EventGraph]" = OrderedDict()
+_cache_lock = threading.Lock()
+# 同一事件的互动图构建串行执行，并发的冷请求只构建一次；
+# 事件ID -> [锁, 等待及持有该锁的线程数]，计数归零时移除，锁的数量不超过并发构建数
+_build_locks: Dict[int, list] = {}
+
+
+@contextmanager
+def _build_lock(event_id: int):
+    with _cache_lock:
+        entry = _build_locks.setdefault(event_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _cache_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _build_locks[event_id]
+
+
+def get_event_graph(event_id: int) -> Optional[EventGraph]:
+    """
+    获取事件的互动图分析结果
+
+    按评论数据版本缓存，评论未变化时直接复用；事件没有评论数据时返回None。
+    """
+    storage = get_storage()
+    version = storage.comments_version(event_id)
+    if version is None:
+        return None
+
+    def cached_graph() -> Optional[EventGraph]:
+        with _cache_lock:
+            cached = _cache.get(event_id)
+            if cached is not None and cached.version == version:
+                _cache.move_to_end(event_id)
+                return cached
+        return None
+
+    event_graph = cached_graph()
+    record_cache("event_graph", event_graph is not None)
+    if event_graph is not None:
+        return event_graph
+
+    with _build_lock(event_id):
+        event_graph = cached_graph()
+        if event_graph is not None:
+            return event_graph
+        comments = storage.load_comments(event_id)
+        if comments is None:
+            return None
+        with span("analysis.graph"):
+            graph = build_interaction_graph(comments)
+            labels = label_propagation(graph)
+            side = partition_sides(graph, labels)
+            summary = polarization_summary(graph, labels, side)
+        event_graph = EventGraph(event_id, version, graph, labels, side, summary)
+
+        with _cache_lock:
+            _cache[event_id] = event_graph
+            _cache.move_to_end(event_id)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return event_graph
+
+
+def network_view(event_graph: EventGraph, max_nodes: int = 200) -> Dict:
+    """导出度最高的若干节点及其之间的边，供前端网络图展示"""
+    graph = event_graph.graph
+    degree = graph.degree()
+    top = np.argsort(-degree, kind="stable")[:max_nodes]
+    selected = np.zeros(graph.node_count, dtype=bool)
+    selected[top] = True
+
+    rows = graph.rows()
+    # 每条无向边只保留一次
+    keep = selected[rows] & selected[graph.indices] & (rows < graph.indices)
+
+    nodes = [
+        {
+            "id": int(i),
+            "name": graph.users[i],
+            "value": float(degree[i]),
+            "category": SIDE_NAMES[int(event_graph.side[i])],
+            "community": int(event_graph.labels[i])
+        }
+        for i in top
+    ]
+    links = [
+        {"source": int(s), "target": int(t), "value": float(w)}
+        for s, t, w in zip(rows[keep], graph.indices[keep], graph.weights[keep])
+    ]
+    return {
+        "eventId": event_graph.event_id,
+        "version": event_graph.version,
+        "categories": list(SIDE_NAMES.values()),
+        "nodes": nodes,
+        "links": links
+    }
@@ -0,0 +1,3 @@
+# 后台任务包初始化文件
+from app.jobs.queue import Job, JobCancelled, JobContext, JobQueue, job_queue
+from app.jobs.store import CANCELLED, COMPLETED, FAILED, QUEUED, RUNNING, JobStore, default_db_path
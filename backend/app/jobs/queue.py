@@ -0,0 +1,341 @@
+"""
+后台任务队列
+
+耗时的分析、索引和预测以任务形式提交，由固定数量的工作线程按优先级执行，
+HTTP请求只负责提交和查询。
+
+- 任务表持久化在SQLite中，服务重启后排队中和被中断的任务会重新排队
+- 优先级高的任务先执行，同优先级按提交顺序；每类任务可限制同时执行的数量
+- 输入（任务类型、参数和数据版本）相同的任务共享结果：已完成且未过期的直接返回，
+  排队或执行中的不会重复提交
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from app.jobs.store import CANCELLED, COMPLETED, FAILED, QUEUED, RUNNING, JobStore
+from app.metrics import Gauge, Histogram, record_cache
+
+# 工作线程数
+JOB_WORKERS = int(os.environ.get("NETPOLAR_JOB_WORKERS", "2"))
+# 已结束任务的保留时间
+JOB_RETENTION = timedelta(days=7)
+# 进度写入任务表的最小间隔（秒）
+PROGRESS_INTERVAL = 0.5
+
+job_duration = Histogram("netpolar_job_duration_seconds", "后台任务执行耗时", ("kind", "status"),
+                         buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0))
+
+
+class JobCancelled(Exception):
+    """任务被取消（由JobContext.progress抛出）"""
+
+
+class Job(BaseModel):
+    job_id: str
+    kind: str
+    params: Dict[str, Any]
+    priority: int = 0
+    status: str
+    progress: float = 0.0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    cached: bool = False  # 是否复用了相同输入的任务
+
+
+def _to_job(record: Dict[str, Any], cached: bool = False) -> Job:
+    return Job(job_id=record["id"], cached=cached, **{k: v for k, v in record.items()
+                                                      if k not in ("id", "input_hash")})
+
+
+class JobKind:
+    """
+    已注册的任务类型
+
+    func(params, context) 执行任务并返回可JSON序列化的结果；
+    params_model 为参数的pydantic模型，提交时校验参数并补全默认值；
+    version(params) 返回输入数据的版本，参与结果缓存的键；
+    concurrency 限制同时执行的数量；cache_ttl 为结果缓存的有效期（秒），None表示不过期。
+    """
+
+    def __init__(self, name: str, func: Callable, params_model: Optional[Type[BaseModel]] = None,
+                 version: Optional[Callable] = None, concurrency: Optional[int] = None,
+                 cache_ttl: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.params_model = params_model
+        self.version = version
+        self.concurrency = concurrency
+        self.cache_ttl = cache_ttl
+
+
+class JobContext:
+    """传给任务函数的上下文，用于报告进度和响应取消"""
+
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self._queue = queue
+        self.job_id = job_id
+        self._cancelled = threading.Event()
+        self.requeue = False  # 因服务关闭而中断，重启后重新执行
+        self._last_write = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self, requeue: bool = False) -> None:
+        self.requeue = requeue
+        self._cancelled.set()
+
+    def progress(self, fraction: float) -> None:
+        """报告进度（0~1）；任务已被取消时抛出JobCancelled"""
+        if self.cancelled:
+            raise JobCancelled()
+        now = time.monotonic()
+        if now - self._last_write >= PROGRESS_INTERVAL or fraction >= 1:
+            self._last_write = now
+            self._queue.store.update(self.job_id, progress=min(1.0, max(0.0, fraction)))
+
+
+class JobQueue:
+    def __init__(self, db_path: Optional[str] = None, workers: int = JOB_WORKERS):
+        self._db_path = db_path
+        self._store: Optional[JobStore] = None
+        self.workers = workers
+        self.kinds: Dict[str, JobKind] = {}
+        self._cond = threading.Condition()
+        self._submit_lock = threading.Lock()
+        # 优先队列：(-优先级, 序号, job_id, 类型)；取消的任务在出队时跳过
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._pending: Dict[str, str] = {}  # 排队中的任务 job_id -> 类型
+        self._running: Dict[str, int] = {}  # 各类型执行中的任务数
+        self._contexts: Dict[str, JobContext] = {}
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore(self._db_path)
+        return self._store
+
+    def set_store(self, store: Optional[JobStore]) -> None:
+        """替换任务表（用于测试或基准测试），原任务表被关闭"""
+        if self._store is not None and self._store is not store:
+            self._store.close()
+        self._store = store
+
+    def register(self, kind: str, params_model: Optional[Type[BaseModel]] = None,
+                 version: Optional[Callable] = None, concurrency: Optional[int] = None,
+                 cache_ttl: Optional[float] = None):
+        """注册任务类型的装饰器"""
+        def decorator(func):
+            self.kinds[kind] = JobKind(kind, func, params_model, version, concurrency, cache_ttl)
+            return func
+        return decorator
+
+    def input_hash(self, kind: str, params: Dict[str, Any]) -> str:
+        handler = self.kinds[kind]
+        version = handler.version(params) if handler.version else None
+        payload = json.dumps({"kind": kind, "params": params, "version": version},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    # 提交与查询
+    def submit(self, kind: str, params: Dict[str, Any], priority: int = 0, force: bool = False) -> Job:
+        """
+        提交任务
+
+        force=False时，相同输入的任务正在排队/执行或已有未过期的结果，直接返回该任务。
+        未注册的任务类型抛出KeyError，参数校验失败抛出pydantic.ValidationError。
+        """
+        if kind not in self.kinds:
+            raise KeyError(kind)
+        model = self.kinds[kind].params_model
+        if model is not None:
+            params = model(**params).dict()
+        params = jsonable_encoder(params)
+        input_hash = self.input_hash(kind, params)
+        with self._submit_lock:
+            if not force:
+                existing = self._find_reusable(kind, input_hash)
+                record_cache("job_result", existing is not None)
+                if existing is not None:
+                    return _to_job(existing, cached=True)
+
+            record = {
+                "id": uuid.uuid4().hex,
+                "kind": kind,
+                "params": params,
+                "input_hash": input_hash,
+                "priority": priority,
+                "status": QUEUED,
+                "progress": 0.0,
+                "created_at": datetime.now(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            }
+            self.store.insert(record)
+        self._enqueue(record["id"], kind, priority)
+        self._ensure_workers()
+        return _to_job(record)
+
+    def _find_reusable(self, kind: str, input_hash: str) -> Optional[Dict[str, Any]]:
+        active = self.store.find_by_hash(input_hash, (QUEUED, RUNNING))
+        if active is not None:
+            return active
+        ttl = self.kinds[kind].cache_ttl
+        since = datetime.now() - timedelta(seconds=ttl) if ttl is not None else None
+        return self.store.find_by_hash(input_hash, (COMPLETED,), since=since)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        record = self.store.get(job_id)
+        return _to_job(record) if record else None
+
+    def result(self, job_id: str) -> Any:
+        return self.store.result(job_id)
+
+    def list(self, status: Optional[str] = None, kind: Optional[str] = None, limit: int = 100) -> List[Job]:
+        return [_to_job(r) for r in self.store.list(status, kind, limit)]
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """取消排队中的任务，或通知执行中的任务停止；已结束的任务不变"""
+        with self._cond:
+            if self._pending.pop(job_id, None) is not None:
+                self.store.update(job_id, status=CANCELLED, finished_at=datetime.now())
+            elif job_id in self._contexts:
+                self._contexts[job_id].cancel()
+        return self.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {QUEUED: len(self._pending), RUNNING: sum(self._running.values())}
+
+    # 调度
+    def _enqueue(self, job_id: str, kind: str, priority: int) -> None:
+        with self._cond:
+            self._pending[job_id] = kind
+            heapq.heappush(self._heap, (-priority, next(self._seq), job_id, kind))
+            self._cond.notify()
+
+    def _next(self) -> Optional[tuple]:
+        """取出优先级最高、且所属类型未达到并发上限的任务"""
+        skipped, entry = [], None
+        while self._heap:
+            candidate = heapq.heappop(self._heap)
+            job_id, kind = candidate[2], candidate[3]
+            if job_id not in self._pending:
+                continue
+            limit = self.kinds[kind].concurrency if kind in self.kinds else None
+            if limit is not None and self._running.get(kind, 0) >= limit:
+                skipped.append(candidate)
+                continue
+            entry = candidate
+            break
+        for candidate in skipped:
+            heapq.heappush(self._heap, candidate)
+        return entry
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                entry = None
+                while not self._stopping and (entry := self._next()) is None:
+                    self._cond.wait()
+                if self._stopping:
+                    if entry is not None:
+                        heapq.heappush(self._heap, entry)
+                    return
+                job_id, kind = entry[2], entry[3]
+                del self._pending[job_id]
+                self._running[kind] = self._running.get(kind, 0) + 1
+                context = self._contexts[job_id] = JobContext(self, job_id)
+            try:
+                self._run(job_id, kind, context)
+            finally:
+                with self._cond:
+                    self._running[kind] -= 1
+                    self._contexts.pop(job_id, None)
+                    self._cond.notify_all()
+
+    def _run(self, job_id: str, kind: str, context: JobContext) -> None:
+        record = self.store.get(job_id)
+        if record is None:
+            return
+        handler = self.kinds.get(kind)
+        started = datetime.now()
+        self.store.update(job_id, status=RUNNING, started_at=started, progress=0.0)
+        start = time.perf_counter()
+        try:
+            if handler is None:
+                raise KeyError(f"未注册的任务类型: {kind}")
+            result = jsonable_encoder(handler.func(record["params"], context))
+        except JobCancelled:
+            if context.requeue:
+                self.store.update(job_id, status=QUEUED, started_at=None, progress=0.0)
+                status = QUEUED
+            else:
+                self.store.update(job_id, status=CANCELLED, finished_at=datetime.now())
+                status = CANCELLED
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, error=str(e), finished_at=datetime.now())
+            status = FAILED
+        else:
+            self.store.update(job_id, status=COMPLETED, progress=1.0, result=result,
+                              finished_at=datetime.now())
+            status = COMPLETED
+        job_duration.labels(kind, status).observe(time.perf_counter() - start)
+
+    def _ensure_workers(self) -> None:
+        with self._cond:
+            if self._threads or self._stopping:
+                return
+            for i in range(max(1, self.workers)):
+                thread = threading.Thread(target=self._worker, name=f"netpolar-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def start(self) -> None:
+        """恢复未完成的任务并启动工作线程"""
+        with self._cond:
+            self._stopping = False
+        self.store.purge(JOB_RETENTION)
+        for record in self.store.unfinished():
+            if record["id"] in self._pending or record["id"] in self._contexts:
+                continue
+            if record["status"] == RUNNING:
+                # 上次运行时被中断
+                self.store.update(record["id"], status=QUEUED, started_at=None, progress=0.0)
+            self._enqueue(record["id"], record["kind"], record["priority"])
+        self._ensure_workers()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """停止工作线程；执行中的任务被中断，下次启动时重新执行"""
+        with self._cond:
+            self._stopping = True
+            for context in self._contexts.values():
+                context.cancel(requeue=True)
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+
+job_queue = JobQueue()
+
+Gauge("netpolar_jobs", "后台任务数", ("status",),
+      callback=lambda: {(status,): n for status, n in job_queue.stats().items()})
@@ -0,0 +1,159 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_hash ON jobs(input_hash, status, finished_at);
+"""
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+_COLUMNS = ("id", "kind", "params", "input_hash", "priority", "status", "progress",
+            "created_at", "started_at", "finished_at", "error")
+_DATETIME_COLUMNS = ("created_at", "started_at", "finished_at")
+
+
+def default_db_path() -> str:
+    """
+    任务表的默认位置
+
+    NETPOLAR_JOBS_DB: 任务表SQLite文件，默认为数据目录（NETPOLAR_DATA_DIR，默认 data）下的 jobs.db
+    """
+    return os.environ.get("NETPOLAR_JOBS_DB") or \
+        os.path.join(os.environ.get("NETPOLAR_DATA_DIR", "data"), "jobs.db")
+
+
+def _to_record(row) -> Dict[str, Any]:
+    record = dict(zip(_COLUMNS, row))
+    record["params"] = json.loads(record["params"])
+    for column in _DATETIME_COLUMNS:
+        if record[column]:
+            record[column] = datetime.fromisoformat(record[column])
+    return record
+
+
+class JobStore:
+    """
+    持久化的任务表（SQLite）
+
+    任务的状态、进度和结果在每次变化时写入，服务重启后未完成的任务可以恢复。
+    结果单独存放，查询任务状态时不读取结果。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        db_path = db_path or default_db_path()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        # 任务更新来自多个工作线程，共用一个连接并串行化
+        self._lock = threading.Lock()
+
+    def _execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params)
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def insert(self, record: Dict[str, Any]) -> None:
+        self._execute(
+            "INSERT INTO jobs (id, kind, params, input_hash, priority, status, progress, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (record["id"], record["kind"], json.dumps(record["params"], ensure_ascii=False),
+             record["input_hash"], record["priority"], record["status"], record["progress"],
+             record["created_at"].isoformat()),
+        )
+
+    def update(self, job_id: str, **fields) -> None:
+        """更新任务字段；result字段会序列化为JSON"""
+        values = []
+        for name, value in fields.items():
+            if name == "result":
+                value = json.dumps(value, ensure_ascii=False)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            values.append(value)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*values, job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,))
+        return _to_record(rows[0]) if rows else None
+
+    def result(self, job_id: str) -> Any:
+        rows = self._query("SELECT result FROM jobs WHERE id = ?", (job_id,))
+        return json.loads(rows[0][0]) if rows and rows[0][0] is not None else None
+
+    def find_by_hash(self, input_hash: str, statuses, since: Optional[datetime] = None
+                     ) -> Optional[Dict[str, Any]]:
+        """查找相同输入的任务；since限制已完成任务的完成时间"""
+        placeholders = ", ".join("?" for _ in statuses)
+        sql = (f"SELECT {', '.join(_COLUMNS)} FROM jobs "
+               f"WHERE input_hash = ? AND status IN ({placeholders})")
+        params = [input_hash, *statuses]
+        if since is not None:
+            sql += " AND (finished_at IS NULL OR finished_at >= ?)"
+            params.append(since.isoformat())
+        rows = self._query(sql + " ORDER BY created_at DESC LIMIT 1", params)
+        return _to_record(rows[0]) if rows else None
+
+    def list(self, status: Optional[str] = None, kind: Optional[str] = None,
+             limit: int = 100) -> List[Dict[str, Any]]:
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if kind:
+            conditions.append("kind = ?")
+            params.append(kind)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = self._query(f"SELECT {', '.join(_COLUMNS)} FROM jobs {where}"
+                           "ORDER BY created_at DESC LIMIT ?", (*params, limit))
+        return [_to_record(r) for r in rows]
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """排队中和执行中的任务，按优先级和提交时间排序"""
+        rows = self._query(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE status IN (?, ?) "
+                           "ORDER BY priority DESC, created_at", (QUEUED, RUNNING))
+        return [_to_record(r) for r in rows]
+
+    def purge(self, older_than: timedelta) -> int:
+        """删除早于指定时间结束的任务"""
+        cutoff = (datetime.now() - older_than).isoformat()
+        placeholders = ", ".join("?" for _ in FINISHED)
+        cursor = self._execute(f"DELETE FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+                               (*FINISHED, cutoff))
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import events, analysis, prediction, monitor
+from app.routers import events, analysis, prediction, monitor, admin, jobs
+from app.metrics import instrument_app
+from app.profiling import instrument_app as instrument_profiling
 
 app = FastAPI(title="网络极化预测系统API")
 
@@ -13,11 +15,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 请求剖析（按需开启）、请求指标与 /metrics 端点
+instrument_profiling(app)
+instrument_app(app)
+
 # 注册路由器
 app.include_router(events.router, prefix="/api/events", tags=["events"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"])
 app.include_router(prediction.router, prefix="/api/prediction", tags=["prediction"])
 app.include_router(monitor.router, prefix="/api/monitor", tags=["monitor"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,322 @@
+"""
+服务运行指标
+
+提供计数器、仪表和预先分桶的直方图，并以Prometheus文本格式在 /metrics 输出。
+
+记录指标时不加锁：每个线程写入自己的分片（单写者），导出时再汇总各线程分片，
+请求处理路径上没有锁竞争；线程首次写入某个指标时注册分片才需要加锁。
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from starlette.routing import Match
+
+# 默认延迟分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Sharded:
+    """
+    按线程分片的数值数组，每个线程只写自己的分片
+
+    线程池会回收空闲线程并按需创建新线程，已结束线程的分片在注册新分片或汇总时
+    并入基数后移除，分片数量不超过存活的线程数。
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        # 注册分片和合并已结束线程的分片时加锁，记录指标的路径不加锁
+        self._lock = threading.Lock()
+        self._base = [0] * size
+        self._shards: List[Tuple[threading.Thread, list]] = []
+
+    def shard(self) -> list:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = [0] * self._size
+            self._local.shard = shard
+            with self._lock:
+                self._fold_dead()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _fold_dead(self) -> None:
+        """将已结束线程的分片并入基数（需持有锁）；线程结束后不会再写入其分片"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for i, v in enumerate(shard):
+                    self._base[i] += v
+        self._shards = live
+
+    def totals(self) -> list:
+        with self._lock:
+            self._fold_dead()
+            totals = list(self._base)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            for i, v in enumerate(shard):
+                totals[i] += v
+        return totals
+
+
+class _CounterChild:
+    def __init__(self):
+        self._values = _Sharded(1)
+
+    def inc(self, amount: float = 1) -> None:
+        self._values.shard()[0] += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self._values.shard()[0] -= amount
+
+    @property
+    def value(self) -> float:
+        return self._values.totals()[0]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # 各分桶计数 + 总和 + 总数
+        self._values = _Sharded(len(buckets) + 3)
+
+    def observe(self, value: float) -> None:
+        shard = self._values.shard()
+        shard[bisect_left(self._buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        totals = self._values.totals()
+        return totals[:-2], totals[-2], totals[-1]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values) -> object:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            # dict.setdefault在GIL下是原子操作，并发创建时只保留一个
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def collect(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(c.value)}"
+                for k, c in list(self._children.items())]
+
+
+class Gauge(Counter):
+    """可增可减的仪表；也可以用回调函数在导出时取值"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        self._callback = callback
+        super().__init__(name, documentation, labelnames)
+
+    def dec(self, amount: float = 1) -> None:
+        self.labels().dec(amount)
+
+    def collect(self) -> List[str]:
+        if self._callback is None:
+            return super().collect()
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+                for k, v in self._callback().items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self, *labels):
+        """计时上下文管理器"""
+        return _Timer(self.labels(*labels))
+
+    def collect(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def exposition(self) -> str:
+        """Prometheus文本格式"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# HTTP
+http_requests = Counter("netpolar_http_requests_total", "HTTP请求数", ("method", "route", "status"))
+http_latency = Histogram("netpolar_http_request_duration_seconds", "HTTP请求延迟", ("method", "route"))
+http_in_flight = Gauge("netpolar_http_requests_in_flight", "正在处理的HTTP请求数", ("route",))
+
+# 存储
+storage_load = Histogram("netpolar_storage_load_seconds", "存储读取与解析耗时", ("backend", "store"))
+
+# 监控任务与WebSocket
+monitor_tick = Histogram("netpolar_monitor_tick_seconds", "monitor_task每次推送的耗时")
+
+# 缓存
+cache_requests = Counter("netpolar_cache_requests_total", "缓存访问次数", ("cache", "result"))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    cache_requests.labels(cache, "hit" if hit else "miss").inc()
+
+
+def _cache_hit_ratios() -> Dict[Tuple[str, ...], float]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), child in list(cache_requests._children.items()):
+        entry = totals.setdefault(cache, [0, 0])
+        entry[0 if result == "hit" else 1] += child.value
+    return {(cache,): hit / (hit + miss) for cache, (hit, miss) in totals.items() if hit + miss}
+
+
+cache_hit_ratio = Gauge("netpolar_cache_hit_ratio", "缓存命中率", ("cache",), callback=_cache_hit_ratios)
+
+
+class MetricsMiddleware:
+    """记录每个路由的请求延迟、状态码和并发数（ASGI中间件）"""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _route(scope) -> str:
+        router = getattr(scope.get("app"), "router", None)
+        for route in getattr(router, "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unmatched")
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route(scope)
+        method = scope["method"]
+        status = 500
+        in_flight = http_in_flight.labels(route)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_latency.labels(method, route).observe(time.perf_counter() - start)
+            http_requests.labels(method, route, status).inc()
+            in_flight.dec()
+
+
+def instrument_app(app: FastAPI) -> None:
+    """为应用添加指标中间件和 /metrics 端点"""
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(registry.exposition(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,202 @@
+"""
+请求剖析与采样分析器
+
+开启剖析（设置中 enabled=True，或请求头 X-Profile: 1）后，记录每个请求中
+存储读取、分析、预测和序列化等阶段的耗时；超过慢请求阈值的请求会连同阶段耗时
+一起写入日志，带请求头的请求还会在响应中返回 Server-Timing 头。
+
+sample_stacks 对进程内所有线程定时采样调用栈，输出火焰图工具可用的折叠栈格式。
+"""
+import functools
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+logger = logging.getLogger("netpolar.profiling")
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfilingSettings(BaseModel):
+    enabled: bool = os.environ.get("NETPOLAR_PROFILING", "0") == "1"  # 是否对所有请求开启剖析
+    slow_request_ms: float = 500.0  # 慢请求阈值（毫秒）
+
+
+profiling_settings = ProfilingSettings()
+
+
+class RequestTrace:
+    """单个请求的阶段耗时记录"""
+
+    __slots__ = ("method", "path", "start", "spans")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.start = time.perf_counter()
+        self.spans: List[tuple] = []
+
+    def add(self, name: str, duration: float) -> None:
+        self.spans.append((name, duration))
+
+    def breakdown(self) -> Dict[str, float]:
+        """按阶段汇总耗时（毫秒）"""
+        totals: Dict[str, float] = {}
+        for name, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration * 1000
+        return totals
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("netpolar_trace", default=None)
+
+
+class span:
+    """
+    记录一个阶段的耗时；当前请求未开启剖析时几乎没有开销
+
+        with span("storage.events"):
+            ...
+    """
+
+    __slots__ = ("name", "_trace", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._trace = _current_trace.get()
+        if self._trace is not None:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._trace is not None:
+            self._trace.add(self.name, time.perf_counter() - self._start)
+        return False
+
+
+class ProfilingMiddleware:
+    """为开启剖析的请求创建阶段耗时记录，并记录慢请求（ASGI中间件）"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        requested = headers.get(PROFILE_HEADER, b"").lower() in (b"1", b"true")
+        if not (requested or profiling_settings.enabled):
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope["method"], scope["path"])
+        token = _current_trace.set(trace)
+
+        async def send_wrapper(message):
+            if requested and message["type"] == "http.response.start":
+                timing = ", ".join(f"{name.replace('.', '-')};dur={ms:.2f}"
+                                   for name, ms in trace.breakdown().items())
+                if timing:
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            elapsed_ms = (time.perf_counter() - trace.start) * 1000
+            if elapsed_ms >= profiling_settings.slow_request_ms:
+                spans = ", ".join(f"{name}={ms:.1f}ms" for name, ms in trace.breakdown().items())
+                logger.warning("慢请求 %s %s 耗时 %.1fms [%s]", trace.method, trace.path, elapsed_ms, spans)
+
+
+def _timed_endpoint(endpoint):
+    """包装路由函数，记录处理函数本身的耗时"""
+    # include_router会用已包装的函数重新创建路由，避免重复包装
+    if getattr(endpoint, "_profiled", False):
+        return endpoint
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            with span("endpoint"):
+                return await endpoint(*args, **kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            with span("endpoint"):
+                return endpoint(*args, **kwargs)
+    wrapper._profiled = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    记录路由处理耗时的APIRoute
+
+    请求处理总耗时减去依赖解析和处理函数耗时即为响应校验与序列化耗时，记为 serialization。
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request):
+            trace = _current_trace.get()
+            if trace is None:
+                return await handler(request)
+            before = len(trace.spans)
+            start = time.perf_counter()
+            response = await handler(request)
+            total = time.perf_counter() - start
+            inner = sum(d for name, d in trace.spans[before:] if name == "endpoint")
+            trace.add("serialization", max(0.0, total - inner))
+            return response
+
+        return profiled_handler
+
+
+def instrument_app(app) -> None:
+    """为应用添加剖析中间件"""
+    app.add_middleware(ProfilingMiddleware)
+
+
+def _frame_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> str:
+    """
+    在指定时长内定时采样所有线程（采样线程自身除外）的调用栈
+
+    返回折叠栈格式文本，每行为 "线程名;栈帧;...;栈帧 次数"，可直接用于 flamegraph.pl 或 speedscope。
+    """
+    me = threading.get_ident()
+    counts: StackCounter = StackCounter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            counts[f"{names.get(ident, ident)};{_frame_stack(frame)}"] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
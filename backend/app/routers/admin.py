@@ -0,0 +1,52 @@
+import os
+import threading
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from app.profiling import ProfiledRoute, ProfilingSettings, sample_stacks
+import app.profiling as profiling
+
+# 管理端点默认关闭，设置环境变量 NETPOLAR_ADMIN=1 后开启
+ADMIN_ENABLED = os.environ.get("NETPOLAR_ADMIN", "0") == "1"
+
+# 同一时间只允许一个采样会话
+_sampling_lock = threading.Lock()
+
+def require_admin_enabled():
+    """管理端点未开启时按不存在处理"""
+    if not ADMIN_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+router = APIRouter(route_class=ProfiledRoute, dependencies=[Depends(require_admin_enabled)])
+
+@router.get("/profiling/settings")
+async def get_profiling_settings():
+    """
+    获取当前剖析设置
+    """
+    return profiling.profiling_settings
+
+@router.post("/profiling/settings")
+async def update_profiling_settings(settings: ProfilingSettings):
+    """
+    更新剖析设置（是否对所有请求开启剖析、慢请求阈值）
+    """
+    profiling.profiling_settings = settings
+    return {"message": "剖析设置已更新", "settings": settings}
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def run_sampling_profiler(
+    seconds: float = Query(5.0, gt=0, le=60, description="采样时长（秒）"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="采样间隔（毫秒）")
+):
+    """
+    在指定时长内对服务进程采样，返回折叠栈格式的结果（可用于生成火焰图）
+
+    已有采样在进行时返回409。
+    """
+    if not _sampling_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="已有采样正在进行")
+    try:
+        return await run_in_threadpool(sample_stacks, seconds, interval_ms / 1000)
+    finally:
+        _sampling_lock.release()
@@ -1,11 +1,18 @@
 from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, List, Optional
-import json
-import os
+from datetime import datetime
 from pydantic import BaseModel
 import random
+import numpy as np
+from app.storage import get_storage
+from app.profiling import ProfiledRoute
+from app.graph import get_event_graph, network_view
+from app.sharding import TOP_K, analyze_event_comments, shutdown_executor, summarize
+from app.jobs import Job, job_queue
+from app.routers.jobs import submit_job
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 # 数据模型
 class AnalysisResult(BaseModel):
@@ -23,20 +30,47 @@ class CommentAnalysis(BaseModel):
     topics: List[str]
     polarizationContribution: float
 
+class CommentsSummary(BaseModel):
+    eventId: int
+    commentCount: int
+    shardCount: int
+    recomputedShards: int
+    sentimentDistribution: Dict[str, float]
+    topicDistribution: Dict[str, float]
+    polarizationMean: float
+    polarizationVariance: float
+    polarizationSkewness: float
+
+class GraphAnalysis(BaseModel):
+    eventId: int
+    version: str
+    nodeCount: int
+    edgeCount: int
+    communityCount: int
+    largestCommunities: List[int]
+    modularity: float
+    randomWalkControversy: Optional[float] = None
+    crossSideEdgeRatio: Optional[float] = None
+    sideSizes: Dict[str, int]
+
+class EventJobParams(BaseModel):
+    event_id: int
+
+class RelatedIndexParams(BaseModel):
+    event_ids: Optional[List[int]] = None  # 为空时重建全部事件
+    limit: int = 5  # 每个事件保留的相关事件数
+
+# 相关事件得分中同类别所占的权重，其余为关键词Jaccard相似度
+CATEGORY_WEIGHT = 0.2
+
 # 工具函数
 def load_analysis(event_id: int):
     """加载特定事件的分析结果"""
-    try:
-        with open(f"data/analysis/results_{event_id}.json", "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return None
+    return get_storage().load_analysis(event_id)
 
 def save_analysis(event_id: int, analysis_data: dict):
     """保存分析结果"""
-    os.makedirs("data/analysis", exist_ok=True)
-    with open(f"data/analysis/results_{event_id}.json", "w", encoding="utf-8") as f:
-        json.dump(analysis_data, f, ensure_ascii=False, indent=2)
+    get_storage().save_analysis(event_id, analysis_data)
 
 def generate_mock_analysis(event_id: int):
     """生成模拟分析数据（开发测试用）"""
@@ -85,6 +119,94 @@ def generate_mock_analysis(event_id: int):
     
     return analysis
 
+def compute_related_events(events: List[dict], event_ids: List[int], limit: int,
+                           progress=None) -> Dict[int, dict]:
+    """
+    按关键词的Jaccard相似度（同类别加权）计算相关事件
+
+    通过关键词倒排表只对至少共享一个关键词的事件打分；没有关键词的事件按类别匹配。
+    """
+    position = {e["id"]: i for i, e in enumerate(events)}
+    keyword_sets = [set(e.get("keywords") or []) for e in events]
+    sizes = np.array([len(k) for k in keyword_sets])
+    categories = np.array([e.get("category") for e in events], dtype=object)
+    ids = np.array([e["id"] for e in events])
+    postings: Dict[str, list] = {}
+    for i, keywords in enumerate(keyword_sets):
+        for keyword in keywords:
+            postings.setdefault(keyword, []).append(i)
+    postings = {k: np.array(v) for k, v in postings.items()}
+    category_postings: Dict[str, np.ndarray] = {}
+
+    results = {}
+    for n, event_id in enumerate(event_ids):
+        related = {"eventId": event_id, "relatedEvents": [], "relationStrength": {}}
+        i = position.get(event_id)
+        if i is not None:
+            if keyword_sets[i]:
+                candidates, shared = np.unique(np.concatenate([postings[k] for k in keyword_sets[i]]),
+                                               return_counts=True)
+            else:
+                category = categories[i]
+                if category not in category_postings:
+                    category_postings[category] = np.flatnonzero(categories == category)
+                candidates = category_postings[category]
+                shared = np.zeros(len(candidates))
+            with np.errstate(invalid="ignore"):
+                jaccard = np.nan_to_num(shared / (sizes[candidates] + sizes[i] - shared))
+            score = (1 - CATEGORY_WEIGHT) * jaccard + CATEGORY_WEIGHT * (categories[candidates] == categories[i])
+            score[candidates == i] = -1
+            top = np.argsort(-score, kind="stable")[:limit]
+            top = top[score[top] > 0]
+            related["relatedEvents"] = [int(ids[candidates[j]]) for j in top]
+            related["relationStrength"] = {str(ids[candidates[j]]): float(score[j]) for j in top}
+        results[event_id] = related
+        if progress is not None and n % 100 == 0:
+            progress(n / len(event_ids))
+    return results
+
+@job_queue.register("event_analysis", params_model=EventJobParams,
+                    version=lambda params: get_storage().comments_version(params["event_id"]))
+def event_analysis_job(params: Dict, context) -> Dict:
+    """
+    后台任务：由全部评论重新计算事件的分析结果（情感与话题分布、极化得分、互动图指标）并保存
+    """
+    event_id = params["event_id"]
+    aggregate = analyze_event_comments(event_id)
+    if aggregate is None:
+        raise ValueError(f"Comments for event {event_id} not found")
+    context.progress(0.5)
+    event_graph = get_event_graph(event_id)
+    context.progress(0.9)
+
+    summary = summarize(aggregate)
+    analysis_data = load_analysis(event_id) or generate_mock_analysis(event_id)
+    analysis_data.update({
+        "timestamp": datetime.now().isoformat(),
+        "sentimentDistribution": summary["sentimentDistribution"],
+        "topicDistribution": summary["topicDistribution"],
+        "polarizationScore": summary["polarizationMean"],
+        "commentCount": summary["commentCount"],
+    })
+    if event_graph is not None:
+        analysis_data["graph"] = event_graph.summary
+    save_analysis(event_id, analysis_data)
+    return analysis_data
+
+@job_queue.register("related_index", params_model=RelatedIndexParams, cache_ttl=600,
+                    version=lambda params: get_storage().events_version())
+def related_index_job(params: Dict, context) -> Dict:
+    """
+    后台任务：重建相关事件索引
+    """
+    storage = get_storage()
+    events = storage.load_events()
+    event_ids = params["event_ids"] or [e["id"] for e in events]
+    related = compute_related_events(events, event_ids, params["limit"], context.progress)
+    for event_id, related_data in related.items():
+        storage.save_related(event_id, related_data)
+    return {"indexedEvents": len(related)}
+
 # 路由
 @router.get("/events/{event_id}", response_model=AnalysisResult)
 async def get_event_analysis(event_id: int = Path(..., description="事件ID")):
@@ -103,55 +225,75 @@ async def get_event_analysis(event_id: int = Path(..., description="事件ID")):
 @router.get("/comments/{event_id}", response_model=List[CommentAnalysis])
 async def get_comments_analysis(
     event_id: int = Path(..., description="事件ID"),
-    limit: int = Query(20, description="返回结果数量限制"),
+    limit: int = Query(20, ge=1, le=TOP_K, description="返回结果数量限制"),
     sort_by: str = Query("polarization", description="排序方式：polarization, sentiment")
 ):
     """
     获取事件评论的分析结果
     """
-    # 检查评论数据是否存在
-    comments_file = f"data/events/comments_{event_id}.json"
-    if not os.path.exists(comments_file):
+    # 评论按分片并行分析，只重算变化的分片
+    aggregate = await run_in_threadpool(analyze_event_comments, event_id)
+    if aggregate is None:
         raise HTTPException(status_code=404, detail=f"Comments for event {event_id} not found")
     
-    # 加载评论数据
-    with open(comments_file, "r", encoding="utf-8") as f:
-        comments = json.load(f)
-    
-    # 模拟分析结果（实际应用中这部分应该从分析系统获取）
-    sentiment_options = ["positive", "neutral", "negative"]
-    topic_options = ["政治", "经济", "社会", "科技", "文化", "教育", "健康", "环境"]
-    
-    analysis_results = []
-    for comment in comments[:min(limit*2, len(comments))]:  # 取更多以便后续筛选
-        analysis = CommentAnalysis(
-            commentId=comment["id"],
-            text=comment["content"],
-            sentiment=random.choice(sentiment_options),
-            topics=random.sample(topic_options, random.randint(1, 3)),
-            polarizationContribution=random.uniform(0, 1)
-        )
-        analysis_results.append(analysis)
-    
-    # 排序
-    if sort_by == "polarization":
-        analysis_results.sort(key=lambda x: x.polarizationContribution, reverse=True)
-    elif sort_by == "sentiment":
-        # 按情感排序（负面->中性->正面）
-        sentiment_order = {"negative": 0, "neutral": 1, "positive": 2}
-        analysis_results.sort(key=lambda x: sentiment_order[x.sentiment])
+    # 各分片保留了每种排序方式的前TOP_K条，合并后即为全局排序结果
+    if sort_by in aggregate["top"]:
+        analysis_results = aggregate["top"][sort_by]
+    else:
+        analysis_results = aggregate["head"]
     
     return analysis_results[:limit]
 
+@router.get("/comments/{event_id}/summary", response_model=CommentsSummary)
+async def get_comments_summary(event_id: int = Path(..., description="事件ID")):
+    """
+    获取事件全部评论的情感分布、话题分布和极化贡献度统计
+    """
+    aggregate = await run_in_threadpool(analyze_event_comments, event_id)
+    if aggregate is None:
+        raise HTTPException(status_code=404, detail=f"Comments for event {event_id} not found")
+    
+    return {
+        "eventId": event_id,
+        "shardCount": aggregate["shardCount"],
+        "recomputedShards": aggregate["recomputedShards"],
+        **summarize(aggregate)
+    }
+
+@router.post("/events/{event_id}/recompute", response_model=Job, status_code=202)
+async def recompute_event_analysis(
+    event_id: int = Path(..., description="事件ID"),
+    priority: int = Query(0, description="任务优先级，数值越大越先执行"),
+    force: bool = Query(False, description="评论未变化时也重新计算")
+):
+    """
+    提交重新计算事件分析结果的后台任务
+    """
+    if get_storage().comments_version(event_id) is None:
+        raise HTTPException(status_code=404, detail=f"Comments for event {event_id} not found")
+    return await run_in_threadpool(submit_job, "event_analysis", {"event_id": event_id}, priority, force)
+
+@router.post("/related/rebuild", response_model=Job, status_code=202)
+async def rebuild_related_index(
+    params: RelatedIndexParams,
+    priority: int = Query(0, description="任务优先级，数值越大越先执行"),
+    force: bool = Query(False, description="忽略最近的重建结果")
+):
+    """
+    提交重建相关事件索引的后台任务（按关键词相似度和类别计算）
+    """
+    return await run_in_threadpool(submit_job, "related_index", params.dict(), priority, force)
+
 @router.get("/related/{event_id}", response_model=Dict)
 async def get_related_events(event_id: int = Path(..., description="事件ID")):
     """
     获取与特定事件相关的其他事件
     """
-    related_file = f"data/analysis/related_{event_id}.json"
+    storage = get_storage()
+    related_data = storage.load_related(event_id)
     
     # 如果数据不存在，创建模拟数据
-    if not os.path.exists(related_file):
+    if related_data is None:
         # 创建随机相关事件ID（1-20范围内）
         related_ids = random.sample(range(1, 21), min(5, 20))
         # 排除当前事件ID
@@ -165,16 +307,43 @@ async def get_related_events(event_id: int = Path(..., description="事件ID")):
         }
         
         # 保存数据
-        os.makedirs("data/analysis", exist_ok=True)
-        with open(related_file, "w", encoding="utf-8") as f:
-            json.dump(related_data, f, ensure_ascii=False, indent=2)
-    else:
-        # 加载已有数据
-        with open(related_file, "r", encoding="utf-8") as f:
-            related_data = json.load(f)
+        storage.save_related(event_id, related_data)
     
     return related_data
 
+@router.get("/graph/{event_id}", response_model=GraphAnalysis)
+async def get_graph_analysis(event_id: int = Path(..., description="事件ID")):
+    """
+    获取事件评论互动图的社区结构与极化指标（模块度、随机游走争议度等）
+    """
+    # 缓存未命中时需要构建互动图并计算社区结构，在线程池中执行，避免阻塞事件循环
+    event_graph = await run_in_threadpool(get_event_graph, event_id)
+    if event_graph is None:
+        raise HTTPException(status_code=404, detail=f"Comments for event {event_id} not found")
+    
+    return {"eventId": event_id, "version": event_graph.version, **event_graph.summary}
+
+@router.get("/graph/{event_id}/network")
+async def get_graph_network(
+    event_id: int = Path(..., description="事件ID"),
+    max_nodes: int = Query(200, ge=1, le=5000, description="返回的最大节点数（按度排序）")
+):
+    """
+    获取事件评论互动网络（节点与边），用于前端网络图展示
+    """
+    event_graph = await run_in_threadpool(get_event_graph, event_id)
+    if event_graph is None:
+        raise HTTPException(status_code=404, detail=f"Comments for event {event_id} not found")
+    
+    return await run_in_threadpool(network_view, event_graph, max_nodes)
+
+@router.on_event("shutdown")
+async def shutdown_event():
+    """
+    应用关闭时释放分片分析进程池
+    """
+    shutdown_executor()
+
 @router.get("/polarization/overview")
 async def get_polarization_overview():
     """
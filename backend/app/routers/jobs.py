@@ -0,0 +1,104 @@
+from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ValidationError
+from app.jobs import COMPLETED, Job, job_queue
+from app.profiling import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# 数据模型
+class JobRequest(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+    priority: int = 0  # 数值越大越先执行
+    force: bool = False  # 忽略已有结果，重新计算
+
+class JobKindInfo(BaseModel):
+    kind: str
+    concurrency: Optional[int] = None
+    cacheTtl: Optional[float] = None
+
+# 工具函数
+def submit_job(kind: str, params: Dict[str, Any], priority: int = 0, force: bool = False) -> Job:
+    """提交任务，参数错误时转换为HTTP 400"""
+    try:
+        return job_queue.submit(kind, params, priority, force)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"未知的任务类型: {kind}")
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.errors())
+
+def get_job_or_404(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+# 路由
+@router.get("/kinds", response_model=List[JobKindInfo])
+async def get_job_kinds():
+    """
+    获取已注册的任务类型
+    """
+    return [{"kind": k.name, "concurrency": k.concurrency, "cacheTtl": k.cache_ttl}
+            for k in job_queue.kinds.values()]
+
+@router.post("/", response_model=Job, status_code=202)
+async def create_job(request: JobRequest):
+    """
+    提交后台任务
+
+    相同输入的任务已在执行或已有未过期的结果时，直接返回该任务（cached=true）。
+    """
+    return await run_in_threadpool(submit_job, request.kind, request.params, request.priority, request.force)
+
+@router.get("/", response_model=List[Job])
+async def list_jobs(
+    status: Optional[str] = Query(None, description="queued, running, completed, failed, cancelled"),
+    kind: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    获取任务列表（按提交时间倒序）
+    """
+    return await run_in_threadpool(job_queue.list, status, kind, limit)
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(job_id: str = Path(..., description="任务ID")):
+    """
+    查询任务状态与进度
+    """
+    return await run_in_threadpool(get_job_or_404, job_id)
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str = Path(..., description="任务ID")):
+    """
+    获取已完成任务的结果
+    """
+    job = await run_in_threadpool(get_job_or_404, job_id)
+    if job.status != COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+    return await run_in_threadpool(job_queue.result, job_id)
+
+@router.post("/{job_id}/cancel", response_model=Job)
+async def cancel_job(job_id: str = Path(..., description="任务ID")):
+    """
+    取消任务：排队中的任务立即取消，执行中的任务在下次报告进度时停止
+    """
+    await run_in_threadpool(get_job_or_404, job_id)
+    return await run_in_threadpool(job_queue.cancel, job_id)
+
+@router.on_event("startup")
+async def startup_event():
+    """
+    恢复未完成的任务并启动工作线程
+    """
+    await run_in_threadpool(job_queue.start)
+
+@router.on_event("shutdown")
+async def shutdown_event():
+    """
+    停止工作线程，执行中的任务在下次启动时重新执行
+    """
+    await run_in_threadpool(job_queue.stop)
@@ -1,25 +1,48 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, WebSocket, WebSocketDisconnect
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime, timedelta
 import random
 import asyncio
 import json
+from collections import OrderedDict
 from pydantic import BaseModel
+from app.graph.builder import comment_stance
+from app.streaming import estimator, ALL_EVENTS, ALL_PLATFORMS
+from app.alerts import AlertEngine, AlertRule
+from app.routers.prediction import predict_polarization_index
+from app.storage import get_storage
+from app.metrics import Gauge, monitor_tick, record_cache
+from app.profiling import ProfiledRoute
 
 router = APIRouter(
     prefix="/monitor",
     tags=["monitor"],
     responses={404: {"description": "Not found"}},
+    route_class=ProfiledRoute,
 )
 
-# 模拟的连接客户端
-connected_clients = set()
+# 已连接的客户端及其待发送队列
+connected_clients: Dict[WebSocket, asyncio.Queue] = {}
+SEND_QUEUE_SIZE = 100
+
+Gauge("netpolar_websocket_clients", "WebSocket连接数",
+      callback=lambda: {(): len(connected_clients)})
+Gauge("netpolar_websocket_send_queue_depth", "WebSocket待发送消息总数",
+      callback=lambda: {(): sum(q.qsize() for q in list(connected_clients.values()))})
 
 class MonitoringSettings(BaseModel):
     update_interval: int = 5  # 更新间隔（秒）
     alert_threshold: float = 0.75  # 警报阈值
     is_active: bool = True  # 监控是否激活
 
+class StreamComment(BaseModel):
+    event_id: str
+    platform: str
+    stance: Optional[float] = None  # 立场（-1~1），优先于sentiment
+    sentiment: Optional[Union[float, str]] = None
+    timestamp: Optional[datetime] = None
+
 # 全局监控设置
 monitoring_settings = MonitoringSettings()
 
@@ -28,6 +51,53 @@ current_pi_value = 0.6
 alert_history = []
 monitoring_events = []
 
+# 警报引擎，默认规则对应全局极化指数阈值
+DEFAULT_RULE_ID = "global-threshold"
+alert_engine = AlertEngine()
+
+def default_alert_rule(threshold: float) -> AlertRule:
+    return AlertRule(rule_id=DEFAULT_RULE_ID, event_id=ALL_EVENTS, platform=ALL_PLATFORMS, threshold=threshold)
+
+alert_engine.set_rule(default_alert_rule(monitoring_settings.alert_threshold))
+
+# 预测值缓存（LRU）：event_id -> (缓存时间, 预测极化指数)
+FORECAST_TTL = 60
+FORECAST_HORIZON = 24
+FORECAST_CACHE_SIZE = 256
+forecast_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+# 事件类别映射缓存：(事件列表版本, {事件ID: 类别})
+_categories_cache: Optional[tuple] = None
+
+def event_categories() -> Dict[str, str]:
+    """事件ID到类别的映射，供警报规则按类别匹配；事件列表未变化时复用缓存"""
+    global _categories_cache
+    storage = get_storage()
+    version = storage.events_version()
+    if _categories_cache is not None and _categories_cache[0] == version:
+        record_cache("event_categories", True)
+        return _categories_cache[1]
+    record_cache("event_categories", False)
+    categories = {str(e["id"]): e["category"] for e in storage.load_events()}
+    _categories_cache = (version, categories)
+    return categories
+
+def forecast_pi(event_id: str) -> Optional[float]:
+    """获取事件的预测极化指数（带缓存）"""
+    now = datetime.now()
+    cached = forecast_cache.get(event_id)
+    if cached and (now - cached[0]).total_seconds() < FORECAST_TTL:
+        record_cache("forecast", True)
+        forecast_cache.move_to_end(event_id)
+        return cached[1]
+    record_cache("forecast", False)
+    predicted = predict_polarization_index(event_id, FORECAST_HORIZON, 0.95)["predicted_pi"]
+    forecast_cache[event_id] = (now, predicted)
+    forecast_cache.move_to_end(event_id)
+    while len(forecast_cache) > FORECAST_CACHE_SIZE:
+        forecast_cache.popitem(last=False)
+    return predicted
+
 platforms = ["twitter", "facebook", "reddit", "weibo", "youtube"]
 event_types = ["极化上升", "极化下降", "达到阈值", "系统重启"]
 
@@ -37,10 +107,14 @@ async def generate_monitoring_data():
     """
     global current_pi_value, alert_history, monitoring_events
     
-    # 随机波动极化指数值
-    trend = random.choice([-1, 1, 1])  # 稍微偏向上升
-    change = random.uniform(0.01, 0.04) * trend
-    current_pi_value = max(0.1, min(0.95, current_pi_value + change))
+    # 有实时评论数据时使用流式估计值，否则随机波动极化指数值
+    live = estimator.live_pi()
+    if live is not None:
+        current_pi_value = live["pi"]
+    else:
+        trend = random.choice([-1, 1, 1])  # 稍微偏向上升
+        change = random.uniform(0.01, 0.04) * trend
+        current_pi_value = max(0.1, min(0.95, current_pi_value + change))
     
     # 获取当前时间
     now = datetime.now()
@@ -62,16 +136,12 @@ async def generate_monitoring_data():
         if len(monitoring_events) > 50:
             monitoring_events = monitoring_events[-50:]
     
-    # 检查是否超过警报阈值
-    if current_pi_value > monitoring_settings.alert_threshold:
-        alert_history.append({
-            "alert_id": f"alt_{len(alert_history) + 1}",
-            "timestamp": now,
-            "pi_value": current_pi_value,
-            "threshold": monitoring_settings.alert_threshold,
-            "status": "已触发",
-            "description": f"极化指数({current_pi_value:.2f})超过警报阈值({monitoring_settings.alert_threshold:.2f})"
-        })
+    # 按规则评估全局及各事件/平台的极化指数序列，同一警报持续期间不重复记录
+    series = estimator.series_values()
+    series[(ALL_EVENTS, ALL_PLATFORMS)] = current_pi_value
+    fired, _ = alert_engine.evaluate(series, event_categories, forecast_pi, now)
+    if fired:
+        alert_history.extend(fired)
         
         # 保持警报历史在合理大小
         if len(alert_history) > 100:
@@ -81,28 +151,47 @@ async def generate_monitoring_data():
     return {
         "timestamp": now.isoformat(),
         "pi_value": current_pi_value,
-        "is_alert": current_pi_value > monitoring_settings.alert_threshold,
+        "pi_lower": live["lower"] if live else None,
+        "pi_upper": live["upper"] if live else None,
+        "is_live": live is not None,
+        "platform_pi": estimator.platforms(),
+        "is_alert": bool(alert_engine.open_alerts()),
         "latest_events": monitoring_events[-5:] if monitoring_events else [],
         "alert_count": len([a for a in alert_history if (now - a["timestamp"]).total_seconds() < 3600])  # 过去一小时的警报数
     }
 
+async def client_sender(websocket: WebSocket, queue: asyncio.Queue):
+    """
+    逐条发送客户端队列中的数据，慢客户端不会阻塞其他客户端的推送
+    """
+    try:
+        while True:
+            data = await queue.get()
+            await websocket.send_json(data)
+    except Exception:
+        connected_clients.pop(websocket, None)
+
+def broadcast(data: dict):
+    """
+    将数据放入所有客户端的发送队列，队列已满时丢弃最旧的数据
+    """
+    # 数据中包含datetime，统一编码一次后再分发
+    data = jsonable_encoder(data)
+    for queue in list(connected_clients.values()):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(data)
+
 async def monitor_task():
     """
     监控任务，定期发送数据给所有连接的客户端
     """
     while True:
         if monitoring_settings.is_active and connected_clients:
-            data = await generate_monitoring_data()
-            # 发送数据给所有连接的客户端
-            disconnected = set()
-            for client in connected_clients:
-                try:
-                    await client.send_json(data)
-                except Exception:
-                    disconnected.add(client)
-            
-            # 移除断开连接的客户端
-            connected_clients.difference_update(disconnected)
+            with monitor_tick.time():
+                data = await generate_monitoring_data()
+                # 发送数据给所有连接的客户端
+                broadcast(data)
             
         # 根据设置的更新间隔等待
         await asyncio.sleep(monitoring_settings.update_interval)
@@ -132,7 +221,9 @@ async def websocket_endpoint(websocket: WebSocket):
     WebSocket连接，用于实时监控数据
     """
     await websocket.accept()
-    connected_clients.add(websocket)
+    queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+    connected_clients[websocket] = queue
+    sender = asyncio.create_task(client_sender(websocket, queue))
     try:
         while True:
             # 接收客户端消息（可选）
@@ -140,7 +231,10 @@ async def websocket_endpoint(websocket: WebSocket):
             # 处理客户端消息（此处简单回显）
             await websocket.send_text(f"收到: {data}")
     except WebSocketDisconnect:
-        connected_clients.remove(websocket)
+        pass
+    finally:
+        connected_clients.pop(websocket, None)
+        sender.cancel()
 
 @router.get("/settings")
 async def get_monitoring_settings():
@@ -156,6 +250,7 @@ async def update_monitoring_settings(settings: MonitoringSettings):
     """
     global monitoring_settings
     monitoring_settings = settings
+    alert_engine.set_rule(default_alert_rule(settings.alert_threshold))
     return {"message": "监控设置已更新", "settings": monitoring_settings}
 
 @router.get("/alerts")
@@ -165,6 +260,37 @@ async def get_alert_history(limit: int = 20):
     """
     return {"alerts": alert_history[-limit:]}
 
+@router.get("/alerts/active")
+async def get_active_alerts():
+    """
+    获取尚未解除的警报
+    """
+    return {"alerts": alert_engine.open_alerts()}
+
+@router.get("/alerts/rules")
+async def get_alert_rules():
+    """
+    获取警报规则
+    """
+    return {"rules": alert_engine.rules}
+
+@router.post("/alerts/rules")
+async def set_alert_rule(rule: AlertRule):
+    """
+    新增或更新警报规则
+    """
+    alert_engine.set_rule(rule)
+    return {"message": "警报规则已更新", "rule": rule}
+
+@router.delete("/alerts/rules/{rule_id}")
+async def delete_alert_rule(rule_id: str):
+    """
+    删除警报规则
+    """
+    if not alert_engine.remove_rule(rule_id):
+        raise HTTPException(status_code=404, detail=f"Alert rule {rule_id} not found")
+    return {"message": f"Alert rule {rule_id} successfully deleted"}
+
 @router.get("/events")
 async def get_monitoring_events(limit: int = 20):
     """
@@ -172,6 +298,37 @@ async def get_monitoring_events(limit: int = 20):
     """
     return {"events": monitoring_events[-limit:]}
 
+@router.post("/stream/comments")
+async def ingest_stream_comments(comments: List[StreamComment]):
+    """
+    接收实时评论，更新流式极化估计
+    """
+    accepted = 0
+    for comment in comments:
+        stance = comment_stance(comment.dict(exclude_none=True))
+        if stance is None:
+            continue
+        timestamp = comment.timestamp.timestamp() if comment.timestamp else None
+        estimator.update(comment.event_id, comment.platform, stance, timestamp)
+        accepted += 1
+    return {"accepted": accepted, "rejected": len(comments) - accepted}
+
+@router.get("/stream/{event_id}")
+async def get_stream_polarization(event_id: str, platform: str = ALL_PLATFORMS,
+                                  confidence: float = Query(0.95, gt=0, lt=1, description="置信水平")):
+    """
+    获取事件的实时极化指数（指数衰减与滑动窗口估计）及各平台数值
+    """
+    snapshot = estimator.snapshot(event_id, platform, confidence)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"No live data for event {event_id}")
+    return {
+        "event_id": event_id,
+        "platform": platform,
+        **snapshot,
+        "platforms": estimator.platforms(event_id)
+    }
+
 @router.get("/statistics")
 async def get_monitoring_statistics():
     """
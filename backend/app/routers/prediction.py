@@ -1,20 +1,37 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import List, Dict, Any, Callable, Optional, Union
 from datetime import datetime, timedelta
 import random
 import numpy as np
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
+from app.streaming import estimator
+from app.profiling import ProfiledRoute, span
+from app.storage import get_storage
+from app.jobs import COMPLETED, Job, job_queue
+from app.routers.jobs import get_job_or_404, submit_job
+from app.simulation import (PRESET_SCENARIOS, Scenario, SimulationParams, event_stances,
+                            run_scenarios, shutdown_executor)
 
 router = APIRouter(
     prefix="/prediction",
     tags=["prediction"],
     responses={404: {"description": "Not found"}},
+    route_class=ProfiledRoute,
 )
 
+# 预测时间范围的上限（小时）
+MAX_HORIZON = 24 * 365
+
 class PredictionRequest(BaseModel):
     event_id: str
-    prediction_horizon: int = 24  # 预测时间范围，默认24小时
-    confidence_level: float = 0.95  # 置信水平
+    prediction_horizon: int = Field(24, ge=1, le=MAX_HORIZON)  # 预测时间范围，默认24小时
+    confidence_level: float = Field(0.95, gt=0, lt=1)  # 置信水平
+
+# 超过该预测时间范围（小时）的预测作为后台任务执行
+INLINE_HORIZON = 168
 
 class PredictionResponse(BaseModel):
     event_id: str
@@ -23,6 +40,36 @@ class PredictionResponse(BaseModel):
     prediction_time: datetime
     predicted_values: List[Dict[str, Any]]  # 预测的时间序列数据
 
+# 每次模拟的情景数上限
+MAX_SCENARIOS = 8
+
+class SimulationRequest(SimulationParams):
+    event_id: int
+    # 情景名称（见 /simulation/scenarios）或自定义情景，第一个情景作为对照
+    scenarios: List[Union[str, Scenario]] = ["baseline", "bridging", "moderation"]
+    threshold: float = Field(0.75, ge=0, le=1)  # 计算超过该极化指数的概率
+
+    @validator("scenarios")
+    def check_scenarios(cls, v, values):
+        if len(v) > MAX_SCENARIOS:
+            raise ValueError(f"情景数不能超过{MAX_SCENARIOS}")
+        horizon = values.get("horizon")
+        for item in v:
+            if isinstance(item, Scenario) and horizon is not None and item.start_hour > horizon:
+                raise ValueError(f"情景{item.name}的start_hour不能超过horizon")
+        return v
+
+class SimulationJob(BaseModel):
+    job_id: str
+    event_id: int
+    status: str  # queued / running / completed / failed / cancelled
+    progress: float = 0.0
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    cached: bool = False
+    result: Optional[Dict[str, Any]] = None
+
 class TimeSeriesPoint(BaseModel):
     timestamp: datetime
     value: float
@@ -30,9 +77,12 @@ class TimeSeriesPoint(BaseModel):
     upper_bound: Optional[float] = None
 
 # 模拟极化指数预测的函数
-def predict_polarization_index(event_id: str, horizon: int, confidence: float) -> Dict[str, Any]:
+def predict_polarization_index(event_id: str, horizon: int, confidence: float,
+                               progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
     """
     模拟极化指数预测
+
+    progress(完成比例) 在每个时间点计算后调用。
     """
     now = datetime.now()
     
@@ -41,6 +91,12 @@ def predict_polarization_index(event_id: str, horizon: int, confidence: float) -
     noise_level = 0.05  # 噪声水平
     trend_factor = 0.01  # 趋势因子
     
+    # 有实时评论数据时，以流式估计的极化指数为起点，置信区间半宽为噪声水平
+    live = estimator.live_pi(event_id, confidence=confidence)
+    if live is not None:
+        base_pi = live["pi"]
+        noise_level = max(0.01, (live["upper"] - live["lower"]) / 2)
+    
     # 生成预测时间序列
     predicted_series = []
     for i in range(horizon + 1):
@@ -48,7 +104,7 @@ def predict_polarization_index(event_id: str, horizon: int, confidence: float) -
         time_point = now + timedelta(hours=i)
         trend = trend_factor * i
         noise = random.uniform(-noise_level, noise_level)
-        value = min(0.95, base_pi + trend + noise)  # 限制最大值
+        value = max(0, min(0.95, base_pi + trend + noise))  # 限制取值范围
         
         # 计算置信区间
         ci_range = noise_level * 1.5  # 置信区间范围
@@ -61,6 +117,8 @@ def predict_polarization_index(event_id: str, horizon: int, confidence: float) -
             "lower_bound": lower,
             "upper_bound": upper
         })
+        if progress is not None:
+            progress(i / horizon)
     
     # 最终预测值（最后一个时间点的值）
     final_prediction = predicted_series[-1]["value"]
@@ -79,17 +137,33 @@ def predict_polarization_index(event_id: str, horizon: int, confidence: float) -
         "predicted_values": predicted_series
     }
 
-@router.post("/polarization-index", response_model=PredictionResponse)
+@job_queue.register("prediction", params_model=PredictionRequest, cache_ttl=60)
+def prediction_job(params: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    后台任务：预测事件的极化指数
+    """
+    return predict_polarization_index(params["event_id"], params["prediction_horizon"],
+                                      params["confidence_level"], context.progress)
+
+@router.post("/polarization-index", response_model=PredictionResponse,
+             responses={202: {"model": Job, "description": "预测时间范围较长，已作为后台任务提交"}})
 async def predict_pi(request: PredictionRequest):
     """
     预测事件的极化指数
+
+    预测时间范围超过INLINE_HORIZON小时时，作为后台任务（prediction）提交并返回202和任务信息，
+    通过 /api/jobs/{job_id}/result 获取结果。
     """
+    if request.prediction_horizon > INLINE_HORIZON:
+        job = await run_in_threadpool(submit_job, "prediction", request.dict())
+        return JSONResponse(status_code=202, content=jsonable_encoder(job))
     try:
-        prediction_result = predict_polarization_index(
-            request.event_id, 
-            request.prediction_horizon,
-            request.confidence_level
-        )
+        with span("prediction"):
+            prediction_result = predict_polarization_index(
+                request.event_id, 
+                request.prediction_horizon,
+                request.confidence_level
+            )
         return prediction_result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"预测失败: {str(e)}")
@@ -129,4 +203,87 @@ async def get_prediction_trends(event_id: str, days: int = 7):
         "event_id": event_id,
         "accuracy_trend": accuracy_trend,
         "polarization_trend": polarization_trend
-    } 
\ No newline at end of file
+    } 
+
+@router.get("/simulation/scenarios", response_model=List[Scenario])
+async def get_simulation_scenarios():
+    """
+    获取预置的干预情景
+    """
+    return list(PRESET_SCENARIOS.values())
+
+def resolve_scenarios(items: List[Union[str, Scenario, dict]]) -> List[Scenario]:
+    """将情景名称解析为预置情景；未知名称抛出ValueError"""
+    scenarios = []
+    for item in items:
+        if isinstance(item, str):
+            if item not in PRESET_SCENARIOS:
+                raise ValueError(f"未知的情景: {item}")
+            item = PRESET_SCENARIOS[item]
+        elif isinstance(item, dict):
+            item = Scenario(**item)
+        scenarios.append(item)
+    if not scenarios:
+        raise ValueError("至少需要一个情景")
+    return scenarios
+
+@job_queue.register("simulation", params_model=SimulationRequest,
+                    version=lambda params: get_storage().comments_version(params["event_id"]),
+                    concurrency=1)
+def simulation_job(params: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    后台任务：情景模拟（模拟本身在进程池中并行，同一时间只执行一个模拟任务）
+    """
+    request = SimulationRequest(**params)
+    scenarios = resolve_scenarios(request.scenarios)
+    stances = event_stances(request.event_id)
+    if stances is None:
+        raise ValueError(f"事件{request.event_id}的评论没有立场数据")
+    simulation_params = SimulationParams(**request.dict(include=set(SimulationParams.__fields__)))
+    return run_scenarios(stances, simulation_params, scenarios, request.threshold,
+                         lambda done, total: context.progress(done / total))
+
+def to_simulation_job(job: Job, result: Optional[Dict[str, Any]] = None) -> SimulationJob:
+    return SimulationJob(event_id=job.params["event_id"], result=result,
+                         **job.dict(include={"job_id", "status", "progress", "created_at",
+                                             "finished_at", "error", "cached"}))
+
+@router.post("/simulation", response_model=SimulationJob, status_code=202)
+async def submit_simulation(
+    request: SimulationRequest,
+    priority: int = Query(0, description="任务优先级，数值越大越先执行"),
+    force: bool = Query(False, description="忽略已有结果，重新模拟")
+):
+    """
+    提交情景模拟任务：以事件评论的立场分布为初始观点，对每个干预情景运行蒙特卡洛模拟
+
+    立即返回任务ID，通过 GET /simulation/{job_id} 查询进度和结果；
+    相同参数且评论数据未变化时直接返回已有任务。
+    """
+    if get_storage().comments_version(request.event_id) is None:
+        raise HTTPException(status_code=404, detail=f"Comments for event {request.event_id} not found")
+    try:
+        resolve_scenarios(request.scenarios)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    job = await run_in_threadpool(submit_job, "simulation", request.dict(), priority, force)
+    return to_simulation_job(job)
+
+@router.get("/simulation/{job_id}", response_model=SimulationJob)
+async def get_simulation(job_id: str):
+    """
+    查询模拟任务的状态、进度和结果
+    """
+    job = await run_in_threadpool(get_job_or_404, job_id)
+    if job.kind != "simulation":
+        raise HTTPException(status_code=404, detail=f"Simulation job {job_id} not found")
+    result = await run_in_threadpool(job_queue.result, job_id) if job.status == COMPLETED else None
+    return to_simulation_job(job, result)
+
+@router.on_event("shutdown")
+async def shutdown_event():
+    """
+    应用关闭时释放模拟进程池
+    """
+    shutdown_executor()
@@ -0,0 +1,3 @@
+# 评论分片分析包初始化文件
+from app.sharding.aggregate import TOP_K, analyze_comment, summarize
+from app.sharding.shards import analyze_event_comments, shutdown_executor
@@ -0,0 +1,133 @@
+import random
+from typing import Dict, List
+
+SENTIMENT_OPTIONS = ["positive", "neutral", "negative"]
+TOPIC_OPTIONS = ["政治", "经济", "社会", "科技", "文化", "教育", "健康", "环境"]
+SENTIMENT_ORDER = {"negative": 0, "neutral": 1, "positive": 2}
+
+# 每个分片（及合并结果）保留的排序候选评论数
+TOP_K = 200
+
+# 各排序方式对应的保留列表及排序键
+RANKINGS = {
+    "polarization": lambda a: -a["polarizationContribution"],
+    "sentiment": lambda a: SENTIMENT_ORDER[a["sentiment"]],
+}
+
+
+def _sentiment_label(value) -> str:
+    if isinstance(value, str):
+        return value if value in SENTIMENT_ORDER else "neutral"
+    if value > 0.2:
+        return "positive"
+    if value < -0.2:
+        return "negative"
+    return "neutral"
+
+
+def analyze_comment(comment: dict) -> Dict:
+    """
+    分析单条评论（模拟实现）
+
+    评论自带sentiment时直接使用；否则以评论ID为种子生成模拟结果，
+    保证同一评论在任意进程、任意次计算中结果一致。
+    """
+    rng = random.Random(str(comment.get("id")))
+    sentiment = comment.get("sentiment")
+    if isinstance(sentiment, (int, float)):
+        label = _sentiment_label(sentiment)
+        contribution = min(1.0, abs(float(sentiment)))
+    else:
+        label = _sentiment_label(sentiment) if sentiment else rng.choice(SENTIMENT_OPTIONS)
+        contribution = rng.uniform(0, 1)
+    return {
+        "commentId": str(comment.get("id")),
+        "text": comment.get("content", ""),
+        "sentiment": label,
+        "topics": rng.sample(TOPIC_OPTIONS, rng.randint(1, 3)),
+        "polarizationContribution": contribution
+    }
+
+
+def empty_aggregate() -> Dict:
+    """空的部分聚合结果（合并运算的单位元）"""
+    return {
+        "count": 0,
+        "sentimentCounts": {s: 0 for s in SENTIMENT_OPTIONS},
+        "topicCounts": {},
+        # 极化贡献度的幂和 [Σx, Σx², Σx³]
+        "polarizationSums": [0.0, 0.0, 0.0],
+        "head": [],
+        "top": {name: [] for name in RANKINGS},
+    }
+
+
+def aggregate_comments(comments: List[dict]) -> Dict:
+    """计算一组评论的部分聚合结果"""
+    agg = empty_aggregate()
+    analyses = [analyze_comment(c) for c in comments]
+    for a in analyses:
+        x = a["polarizationContribution"]
+        agg["count"] += 1
+        agg["sentimentCounts"][a["sentiment"]] += 1
+        for topic in a["topics"]:
+            agg["topicCounts"][topic] = agg["topicCounts"].get(topic, 0) + 1
+        sums = agg["polarizationSums"]
+        sums[0] += x
+        sums[1] += x * x
+        sums[2] += x * x * x
+    agg["head"] = analyses[:TOP_K]
+    for name, key in RANKINGS.items():
+        agg["top"][name] = sorted(analyses, key=key)[:TOP_K]
+    return agg
+
+
+def merge_aggregates(left: Dict, right: Dict) -> Dict:
+    """
+    合并两个部分聚合结果
+
+    满足结合律：按分片顺序以任意分组方式两两合并，结果相同。
+    """
+    topic_counts = dict(left["topicCounts"])
+    for topic, count in right["topicCounts"].items():
+        topic_counts[topic] = topic_counts.get(topic, 0) + count
+    return {
+        "count": left["count"] + right["count"],
+        "sentimentCounts": {
+            s: left["sentimentCounts"].get(s, 0) + right["sentimentCounts"].get(s, 0)
+            for s in SENTIMENT_OPTIONS
+        },
+        "topicCounts": topic_counts,
+        "polarizationSums": [a + b for a, b in zip(left["polarizationSums"], right["polarizationSums"])],
+        "head": (left["head"] + right["head"])[:TOP_K],
+        # sorted是稳定排序，同分时保持分片顺序
+        "top": {
+            name: sorted(left["top"][name] + right["top"][name], key=key)[:TOP_K]
+            for name, key in RANKINGS.items()
+        },
+    }
+
+
+def summarize(agg: Dict) -> Dict:
+    """由聚合结果计算分布与极化贡献度的均值、方差、偏度"""
+    n = agg["count"]
+    sentiment_dist = {s: (c / n if n else 0.0) for s, c in agg["sentimentCounts"].items()}
+    topic_total = sum(agg["topicCounts"].values())
+    topic_dist = {t: c / topic_total for t, c in agg["topicCounts"].items()} if topic_total else {}
+
+    mean = variance = skewness = 0.0
+    if n:
+        s1, s2, s3 = agg["polarizationSums"]
+        mean = s1 / n
+        variance = max(0.0, s2 / n - mean ** 2)
+        if variance > 0:
+            third = s3 / n - 3 * mean * s2 / n + 2 * mean ** 3
+            skewness = third / variance ** 1.5
+    return {
+        "commentCount": n,
+        "sentimentDistribution": sentiment_dist,
+        "topicDistribution": topic_dist,
+        "polarizationMean": mean,
+        "polarizationVariance": variance,
+        "polarizationSkewness": skewness,
+    }
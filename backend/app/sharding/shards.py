@@ -0,0 +1,218 @@
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import reduce
+from typing import Dict, List, Optional
+
+from app.metrics import record_cache
+from app.profiling import span
+from app.sharding.aggregate import aggregate_comments, empty_aggregate, merge_aggregates
+from app.storage import get_storage
+
+# 每个分片的评论数
+SHARD_SIZE = int(os.environ.get("NETPOLAR_SHARD_SIZE", "5000"))
+# 分析进程数，0表示在当前进程中串行计算
+SHARD_WORKERS = int(os.environ.get("NETPOLAR_SHARD_WORKERS", str(os.cpu_count() or 1)))
+# 最多缓存的事件合并结果数量
+CACHE_SIZE = 16
+# 服务进程是多线程的，fork可能复制其他线程持有的锁，工作进程改用forkserver/spawn启动
+MP_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+# 每个事件的合并结果缓存（LRU）：event_id -> (评论版本, 聚合结果)
+_merged_cache: "OrderedDict[int, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+# 同一事件的重新分片/计算串行执行；
+# 事件ID -> [锁, 等待及持有该锁的线程数]，计数归零时移除
+_event_locks: Dict[int, list] = {}
+
+
+def shard_root() -> str:
+    return os.path.join(os.environ.get("NETPOLAR_DATA_DIR", "data"), "shards")
+
+
+def _event_dir(event_id: int) -> str:
+    return os.path.join(shard_root(), str(event_id))
+
+
+def _read_json(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_json(path: str, data) -> None:
+    # 先写临时文件再替换，避免读到写了一半的分片
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _shard_path(event_id: int, index: int) -> str:
+    return os.path.join(_event_dir(event_id), f"shard_{index:05d}.json")
+
+
+def _aggregate_path(event_id: int, index: int) -> str:
+    return os.path.join(_event_dir(event_id), f"shard_{index:05d}.agg.json")
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    global _executor
+    if SHARD_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=SHARD_WORKERS,
+                                            mp_context=multiprocessing.get_context(MP_START_METHOD))
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """关闭分片分析进程池"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+@contextmanager
+def _event_lock(event_id: int):
+    with _cache_lock:
+        entry = _event_locks.setdefault(event_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _cache_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _event_locks[event_id]
+
+
+def _cached_aggregate(event_id: int, version: str) -> Optional[Dict]:
+    with _cache_lock:
+        cached = _merged_cache.get(event_id)
+        if cached is None or cached[0] != version:
+            return None
+        _merged_cache.move_to_end(event_id)
+        return cached[1]
+
+
+def sync_shards(event_id: int, version: str) -> Optional[dict]:
+    """
+    将事件评论按固定大小切分为磁盘分片，返回分片清单
+
+    清单记录评论版本和每个分片的内容哈希；评论版本未变时直接返回已有清单，
+    内容未变的分片文件不会重写。
+    """
+    manifest_path = os.path.join(_event_dir(event_id), "manifest.json")
+    manifest = _read_json(manifest_path)
+    if manifest and manifest.get("version") == version and manifest.get("shardSize") == SHARD_SIZE:
+        return manifest
+
+    comments = get_storage().load_comments(event_id)
+    if comments is None:
+        return None
+
+    os.makedirs(_event_dir(event_id), exist_ok=True)
+    old_hashes = {}
+    if manifest and manifest.get("shardSize") == SHARD_SIZE:
+        old_hashes = {s["index"]: s["hash"] for s in manifest.get("shards", [])}
+
+    shards = []
+    for index, start in enumerate(range(0, len(comments), SHARD_SIZE)):
+        chunk = comments[start:start + SHARD_SIZE]
+        payload = json.dumps(chunk, ensure_ascii=False, sort_keys=True)
+        digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+        if old_hashes.get(index) != digest or not os.path.exists(_shard_path(event_id, index)):
+            _write_json(_shard_path(event_id, index), chunk)
+        shards.append({"index": index, "hash": digest, "count": len(chunk)})
+
+    # 删除多余的旧分片
+    for path in glob.glob(os.path.join(_event_dir(event_id), "shard_*.json")):
+        name = os.path.basename(path)
+        if int(name[6:11]) >= len(shards):
+            os.remove(path)
+
+    manifest = {"eventId": event_id, "version": version, "shardSize": SHARD_SIZE, "shards": shards}
+    _write_json(manifest_path, manifest)
+    return manifest
+
+
+def analyze_shard(shard_path: str, aggregate_path: str, shard_hash: str) -> Dict:
+    """分析单个分片并写入其部分聚合结果（在工作进程中执行）"""
+    comments = _read_json(shard_path) or []
+    agg = aggregate_comments(comments)
+    _write_json(aggregate_path, {"hash": shard_hash, "aggregate": agg})
+    return agg
+
+
+def analyze_event_comments(event_id: int) -> Optional[Dict]:
+    """
+    获取事件全部评论的合并聚合结果
+
+    只重新计算内容哈希发生变化的分片，多个分片在进程池中并行计算；
+    结果中 shardCount/recomputedShards 记录本次的分片与重算情况。
+    事件没有评论数据时返回None。
+    """
+    version = get_storage().comments_version(event_id)
+    if version is None:
+        return None
+    cached = _cached_aggregate(event_id, version)
+    record_cache("comment_aggregate", cached is not None)
+    if cached is not None:
+        return {**cached, "recomputedShards": 0}
+
+    with _event_lock(event_id):
+        cached = _cached_aggregate(event_id, version)
+        if cached is not None:
+            return {**cached, "recomputedShards": 0}
+
+        manifest = sync_shards(event_id, version)
+        if manifest is None:
+            return None
+
+        aggregates: List[Optional[Dict]] = []
+        stale = []
+        for shard in manifest["shards"]:
+            saved = _read_json(_aggregate_path(event_id, shard["index"]))
+            reusable = bool(saved and saved.get("hash") == shard["hash"])
+            record_cache("shard_aggregate", reusable)
+            if reusable:
+                aggregates.append(saved["aggregate"])
+            else:
+                aggregates.append(None)
+                stale.append(shard)
+
+        jobs = [(_shard_path(event_id, s["index"]), _aggregate_path(event_id, s["index"]), s["hash"])
+                for s in stale]
+        executor = _get_executor() if len(jobs) > 1 else None
+        with span("analysis.shards"):
+            if executor is not None:
+                results = list(executor.map(analyze_shard, *zip(*jobs)))
+            else:
+                results = [analyze_shard(*job) for job in jobs]
+        for shard, agg in zip(stale, results):
+            aggregates[shard["index"]] = agg
+
+        merged = reduce(merge_aggregates, aggregates, empty_aggregate())
+        merged["shardCount"] = len(manifest["shards"])
+        with _cache_lock:
+            _merged_cache[event_id] = (version, merged)
+            _merged_cache.move_to_end(event_id)
+            while len(_merged_cache) > CACHE_SIZE:
+                _merged_cache.popitem(last=False)
+        # 重算分片数只描述本次调用，不写入缓存
+        return {**merged, "recomputedShards": len(stale)}
@@ -0,0 +1,3 @@
+# 情景模拟包初始化文件
+from app.simulation.engine import (PRESET_SCENARIOS, Scenario, SimulationParams, event_stances,
+                                   run_scenarios, shutdown_executor)
@@ -0,0 +1,73 @@
+"""
+观点动力学模型
+
+所有函数对一批蒙特卡洛轨迹同时计算：观点矩阵形状为 (轨迹数, 个体数)，取值 -1~1。
+每条轨迹的个体按初始观点排序，下标小于 n_negative 的个体初始立场为负（用于同质性采样）。
+"""
+import numpy as np
+
+# 初始立场绝对值不低于该值的个体视为极端用户
+EXTREME_STANCE = 0.7
+
+
+def initial_opinions(stances: np.ndarray, trajectories: int, agents: int,
+                     rng: np.random.Generator) -> np.ndarray:
+    """从评论立场分布中有放回地抽样每条轨迹的初始观点，并按观点排序"""
+    sample = stances[rng.integers(0, len(stances), (trajectories, agents))]
+    sample.sort(axis=1)
+    return sample
+
+
+def polarization_index(opinions: np.ndarray) -> np.ndarray:
+    """每条轨迹的极化指数（观点方差，与流式估计的定义一致）"""
+    return np.minimum(1.0, opinions.var(axis=1))
+
+
+def degroot_step(opinions: np.ndarray, n_negative: np.ndarray, rng: np.random.Generator,
+                 mixing: float, neighbors: int, homophily: float) -> np.ndarray:
+    """
+    DeGroot平均：每个个体向随机抽取的neighbors个邻居的平均观点移动mixing比例
+
+    邻居以homophily的概率从与自己初始立场相同的一侧抽取，否则从全体中均匀抽取。
+    """
+    trajectories, agents = opinions.shape
+    n_neg = n_negative[:, None]
+    negative = np.arange(agents) < n_neg
+    # 同侧抽样：负侧在 [0, n_neg)，正侧在 [n_neg, agents)；个体自身总在同侧，同侧不会为空
+    side_start = np.where(negative, 0, n_neg)
+    side_scale = np.where(negative, n_neg, agents - n_neg) / max(homophily, 1e-12)
+    any_scale = agents / max(1 - homophily, 1e-12)
+    flat = opinions.ravel()
+    offset = (np.arange(trajectories) * agents)[:, None]
+
+    # 同一个均匀随机数既决定是否同侧抽样，也决定抽到的位置
+    total = np.zeros_like(opinions)
+    for _ in range(neighbors):
+        u = rng.random((trajectories, agents))
+        position = np.where(u < homophily, side_start + u * side_scale, (u - homophily) * any_scale)
+        idx = position.astype(np.intp)
+        np.minimum(idx, agents - 1, out=idx)
+        idx += offset
+        total += flat.take(idx)
+    return opinions + mixing * (total / neighbors - opinions)
+
+
+def bounded_confidence_step(opinions: np.ndarray, rng: np.random.Generator,
+                            mixing: float, confidence_bound: float) -> np.ndarray:
+    """
+    Deffuant有界信任模型：个体随机两两配对，观点差小于confidence_bound时
+    双方各向对方移动mixing比例，否则互不影响
+    """
+    trajectories, agents = opinions.shape
+    pairs = agents // 2
+    order = rng.permuted(np.broadcast_to(np.arange(agents), (trajectories, agents)), axis=1)
+    left, right = order[:, :pairs], order[:, pairs:2 * pairs]
+    x_left = np.take_along_axis(opinions, left, axis=1)
+    x_right = np.take_along_axis(opinions, right, axis=1)
+    diff = x_right - x_left
+    shift = np.where(np.abs(diff) < confidence_bound, mixing * diff, 0.0)
+    updated = opinions.copy()
+    # 同一轮中每个个体只属于一个配对，下标不重复
+    np.put_along_axis(updated, left, x_left + shift, axis=1)
+    np.put_along_axis(updated, right, x_right - shift, axis=1)
+    return updated
@@ -0,0 +1,311 @@
+"""
+情景模拟引擎
+
+以事件评论的立场分布为初始观点，对每个干预情景运行大量蒙特卡洛轨迹，
+给出极化指数随时间的分布预测。
+
+轨迹按批次计算，批次可在进程池中并行；各情景使用相同的批次随机种子（公共随机数），
+同一批次在不同情景下的初始观点相同，情景之间的差异只来自干预本身。
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel, validator
+
+from app.graph.builder import comment_stance
+from app.profiling import span
+from app.simulation.dynamics import (EXTREME_STANCE, bounded_confidence_step, degroot_step,
+                                     initial_opinions, polarization_index)
+from app.storage import get_storage
+
+MODELS = ("degroot", "bounded_confidence")
+# 每批轨迹数
+BATCH_SIZE = 250
+# 模拟进程数，0表示在当前进程中串行计算
+SIMULATION_WORKERS = int(os.environ.get("NETPOLAR_SIMULATION_WORKERS", str(os.cpu_count() or 1)))
+QUANTILES = (5, 25, 50, 75, 95)
+HISTOGRAM_BINS = 20
+# 参数上限：模拟时长（小时）、每小时互动轮数、DeGroot邻居数
+MAX_HORIZON = 24 * 30
+MAX_ROUNDS_PER_HOUR = 60
+MAX_NEIGHBORS = 50
+# 每条轨迹的计算量上限（个体数×总轮数）
+MAX_AGENT_ROUNDS = 2_000_000
+# 每个情景逐小时极化指数矩阵的元素数上限（轨迹数×(时长+1)），结果在服务进程中汇总
+MAX_TRAJECTORY_POINTS = 2_000_000
+# 服务进程是多线程的，模拟进程改用forkserver/spawn启动
+MP_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class SimulationParams(BaseModel):
+    model: str = "degroot"
+    agents: int = 500  # 每条轨迹的个体数
+    trajectories: int = 2000  # 蒙特卡洛轨迹数
+    horizon: int = 24  # 模拟时长（小时）
+    rounds_per_hour: int = 1  # 每小时的互动轮数
+    mixing: float = 0.3  # 每次互动向对方观点移动的比例
+    neighbors: int = 4  # DeGroot模型每轮参考的邻居数
+    homophily: float = 0.6  # DeGroot模型从同一立场一侧选择邻居的概率
+    confidence_bound: float = 0.5  # 有界信任模型的信任阈值
+    stubbornness: float = 0.1  # 对初始观点的固执程度（Friedkin-Johnsen）
+    noise: float = 0.02  # 每轮观点的随机扰动标准差
+    seed: Optional[int] = None
+
+    @validator("model")
+    def check_model(cls, v):
+        if v not in MODELS:
+            raise ValueError(f"model必须是 {', '.join(MODELS)} 之一")
+        return v
+
+    @validator("agents")
+    def check_agents(cls, v):
+        if not 10 <= v <= 5000:
+            raise ValueError("agents必须在10到5000之间")
+        return v
+
+    @validator("trajectories")
+    def check_trajectories(cls, v):
+        if not 1 <= v <= 50000:
+            raise ValueError("trajectories必须在1到50000之间")
+        return v
+
+    @validator("horizon")
+    def check_horizon(cls, v, values):
+        if not 1 <= v <= MAX_HORIZON:
+            raise ValueError(f"horizon必须在1到{MAX_HORIZON}之间")
+        if "trajectories" in values and values["trajectories"] * (v + 1) > MAX_TRAJECTORY_POINTS:
+            raise ValueError(f"trajectories×(horizon+1)不能超过{MAX_TRAJECTORY_POINTS}")
+        return v
+
+    @validator("rounds_per_hour")
+    def check_rounds(cls, v, values):
+        if not 1 <= v <= MAX_ROUNDS_PER_HOUR:
+            raise ValueError(f"rounds_per_hour必须在1到{MAX_ROUNDS_PER_HOUR}之间")
+        if "agents" in values and "horizon" in values and \
+                values["agents"] * values["horizon"] * v > MAX_AGENT_ROUNDS:
+            raise ValueError(f"agents×horizon×rounds_per_hour不能超过{MAX_AGENT_ROUNDS}")
+        return v
+
+    @validator("neighbors")
+    def check_neighbors(cls, v):
+        if not 1 <= v <= MAX_NEIGHBORS:
+            raise ValueError(f"neighbors必须在1到{MAX_NEIGHBORS}之间")
+        return v
+
+    @validator("mixing", "homophily", "stubbornness", "noise")
+    def check_fraction(cls, v):
+        if not 0 <= v <= 1:
+            raise ValueError("必须在0到1之间")
+        return v
+
+    @validator("confidence_bound")
+    def check_confidence_bound(cls, v):
+        if not 0 < v <= 1:
+            raise ValueError("confidence_bound必须大于0且不超过1")
+        return v
+
+
+class Scenario(BaseModel):
+    """干预情景，参数均为相对基线的调整"""
+    name: str
+    description: Optional[str] = None
+    exposure: float = 1.0  # 跨立场接触倍数：放大信任阈值，降低同质性
+    moderator_fraction: float = 0.0  # 转为坚定中间立场（观点固定为0）的个体比例
+    extremist_stubbornness: Optional[float] = None  # 极端用户的固执程度，None表示与其他用户相同
+    start_hour: int = 0  # 干预开始时间
+
+    @validator("exposure")
+    def check_exposure(cls, v):
+        if v < 0:
+            raise ValueError("exposure不能为负数")
+        return v
+
+    @validator("moderator_fraction")
+    def check_moderators(cls, v):
+        if not 0 <= v <= 1:
+            raise ValueError("moderator_fraction必须在0到1之间")
+        return v
+
+    @validator("start_hour")
+    def check_start(cls, v):
+        if v < 0:
+            raise ValueError("start_hour不能为负数")
+        return v
+
+
+PRESET_SCENARIOS: Dict[str, Scenario] = {s.name: s for s in [
+    Scenario(name="baseline", description="不干预"),
+    Scenario(name="bridging", description="推荐跨立场内容，增加不同观点间的接触", exposure=1.5),
+    Scenario(name="moderation", description="引导10%的用户形成坚定的中间立场", moderator_fraction=0.1),
+    Scenario(name="amplification", description="算法放大极端内容：极端用户更固执、跨立场接触减少",
+             exposure=0.7, extremist_stubbornness=0.6),
+]}
+
+
+def event_stances(event_id: int) -> Optional[np.ndarray]:
+    """事件评论的立场数组；没有评论数据或评论均无立场时返回None"""
+    comments = get_storage().load_comments(event_id)
+    if not comments:
+        return None
+    stances = [s for s in (comment_stance(c) for c in comments) if s is not None]
+    return np.array(stances, dtype=np.float64) if stances else None
+
+
+def simulate_batch(stances: np.ndarray, params: dict, scenario: dict, trajectories: int,
+                   seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    模拟一批轨迹（可在工作进程中执行）
+
+    返回形状为 (trajectories, horizon + 1) 的逐小时极化指数。
+    """
+    rng = np.random.default_rng(seed)
+    x = initial_opinions(stances, trajectories, params["agents"], rng)
+    n_negative = (x < 0).sum(axis=1)
+    anchor = x.copy()
+    stubborn = np.full(x.shape, params["stubbornness"])
+
+    exposure = scenario["exposure"]
+    homophily = 1 - (1 - params["homophily"]) * exposure
+    homophily = min(1.0, max(0.0, homophily))
+    confidence_bound = params["confidence_bound"] * exposure
+    start_round = scenario["start_hour"] * params["rounds_per_hour"]
+
+    rounds = params["horizon"] * params["rounds_per_hour"]
+    pi = np.empty((trajectories, params["horizon"] + 1))
+    pi[:, 0] = polarization_index(x)
+    for t in range(rounds):
+        if t == start_round:
+            if scenario["extremist_stubbornness"] is not None:
+                stubborn[np.abs(anchor) >= EXTREME_STANCE] = scenario["extremist_stubbornness"]
+            if scenario["moderator_fraction"] > 0:
+                moderators = rng.random(x.shape) < scenario["moderator_fraction"]
+                x[moderators] = 0.0
+                anchor[moderators] = 0.0
+                stubborn[moderators] = 1.0
+        if t < start_round:
+            h, eps = params["homophily"], params["confidence_bound"]
+        else:
+            h, eps = homophily, confidence_bound
+
+        if params["model"] == "degroot":
+            updated = degroot_step(x, n_negative, rng, params["mixing"], params["neighbors"], h)
+        else:
+            updated = bounded_confidence_step(x, rng, params["mixing"], eps)
+        x = stubborn * anchor + (1 - stubborn) * updated
+        if params["noise"] > 0:
+            x += rng.normal(0, params["noise"], x.shape) * (stubborn < 1)
+        np.clip(x, -1.0, 1.0, out=x)
+
+        if (t + 1) % params["rounds_per_hour"] == 0:
+            pi[:, (t + 1) // params["rounds_per_hour"]] = polarization_index(x)
+    return pi
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    global _executor
+    if SIMULATION_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS,
+                                            mp_context=multiprocessing.get_context(MP_START_METHOD))
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """关闭模拟进程池"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _distribution(values: np.ndarray, threshold: float) -> Dict:
+    quantiles = np.percentile(values, QUANTILES)
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS, range=(0.0, 1.0))
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "quantiles": {f"p{q}": float(v) for q, v in zip(QUANTILES, quantiles)},
+        "exceedance_probability": float((values > threshold).mean()),
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+    }
+
+
+def summarize_scenario(pi: np.ndarray, threshold: float, start: datetime) -> Dict:
+    """逐小时的极化指数分位数与最终时刻的分布"""
+    bands = np.percentile(pi, QUANTILES, axis=0)
+    means = pi.mean(axis=0)
+    forecast = []
+    for hour in range(pi.shape[1]):
+        point = {"timestamp": start + timedelta(hours=hour), "mean": float(means[hour])}
+        point.update({f"p{q}": float(bands[i, hour]) for i, q in enumerate(QUANTILES)})
+        forecast.append(point)
+    return {"forecast": forecast, "final": _distribution(pi[:, -1], threshold)}
+
+
+def run_scenarios(stances: np.ndarray, params: SimulationParams, scenarios: List[Scenario],
+                  threshold: float = 0.75,
+                  progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    对每个情景运行蒙特卡洛模拟，返回各情景的分布预测
+
+    第一个情景作为对照，其余情景额外给出相对对照的最终极化指数变化（按批次配对）。
+    progress(已完成批次数, 总批次数) 在每批完成后调用。
+    """
+    start = datetime.now()
+    sizes = [min(BATCH_SIZE, params.trajectories - i) for i in range(0, params.trajectories, BATCH_SIZE)]
+    seeds = np.random.SeedSequence(params.seed).spawn(len(sizes))
+    param_dict = params.dict()
+    jobs = [(s, b) for s in range(len(scenarios)) for b in range(len(sizes))]
+    results: Dict[tuple, np.ndarray] = {}
+
+    def done(key, pi):
+        results[key] = pi
+        if progress is not None:
+            progress(len(results), len(jobs))
+
+    executor = _get_executor() if len(jobs) > 1 else None
+    with span("simulation"):
+        if executor is not None:
+            futures = {executor.submit(simulate_batch, stances, param_dict, scenarios[s].dict(),
+                                       sizes[b], seeds[b]): (s, b) for s, b in jobs}
+            try:
+                for future in as_completed(futures):
+                    done(futures[future], future.result())
+            finally:
+                # progress回调抛出异常（如任务被取消）时，不再执行剩余批次
+                for future in futures:
+                    future.cancel()
+        else:
+            for s, b in jobs:
+                done((s, b), simulate_batch(stances, param_dict, scenarios[s].dict(), sizes[b], seeds[b]))
+
+    trajectories = [np.vstack([results[(s, b)] for b in range(len(sizes))]) for s in range(len(scenarios))]
+    output = []
+    for scenario, pi in zip(scenarios, trajectories):
+        summary = summarize_scenario(pi, threshold, start)
+        summary["scenario"] = scenario.dict()
+        if pi is not trajectories[0]:
+            effect = pi[:, -1] - trajectories[0][:, -1]
+            summary["effect_vs_control"] = {
+                "mean": float(effect.mean()),
+                "quantiles": {f"p{q}": float(v) for q, v in zip(QUANTILES, np.percentile(effect, QUANTILES))},
+            }
+        output.append(summary)
+    return {
+        "initial_pi": float(trajectories[0][:, 0].mean()),
+        "comment_count": int(len(stances)),
+        "threshold": threshold,
+        "params": param_dict,
+        "scenarios": output,
+    }
@@ -0,0 +1,41 @@
+# 存储后端包初始化文件
+import os
+from typing import Optional
+
+from app.storage.base import StorageBackend
+from app.storage.json_store import JsonStorage
+from app.storage.sqlite_store import SqliteStorage
+
+_storage: Optional[StorageBackend] = None
+
+
+def create_storage() -> StorageBackend:
+    """
+    根据环境变量创建存储后端
+
+    NETPOLAR_STORAGE: json（默认）或 sqlite
+    NETPOLAR_DATA_DIR: JSON数据目录，默认 data
+    NETPOLAR_SQLITE_PATH: SQLite数据库文件，默认 data/netpolar.db
+    """
+    backend = os.environ.get("NETPOLAR_STORAGE", "json").lower()
+    if backend == "sqlite":
+        return SqliteStorage(os.environ.get("NETPOLAR_SQLITE_PATH", "data/netpolar.db"))
+    if backend == "json":
+        return JsonStorage(os.environ.get("NETPOLAR_DATA_DIR", "data"))
+    raise ValueError(f"未知的存储后端: {backend}")
+
+
+def get_storage() -> StorageBackend:
+    """获取全局存储后端实例"""
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
+
+
+def set_storage(storage: Optional[StorageBackend]) -> None:
+    """替换全局存储后端实例（测试或迁移时使用）"""
+    global _storage
+    if _storage is not None and _storage is not storage:
+        _storage.close()
+    _storage = storage
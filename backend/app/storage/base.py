@@ -0,0 +1,129 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+
+def match_event(event: dict,
+                category: Optional[str] = None,
+                min_polarization: Optional[float] = None,
+                max_polarization: Optional[float] = None,
+                keyword: Optional[str] = None) -> bool:
+    """判断事件是否满足筛选条件（与原有列表筛选逻辑保持一致）"""
+    if category and event["category"] != category:
+        return False
+    if min_polarization is not None and event["polarizationLevel"] < min_polarization:
+        return False
+    if max_polarization is not None and event["polarizationLevel"] > max_polarization:
+        return False
+    if keyword:
+        kw = keyword.lower()
+        if not (kw in event["title"].lower() or
+                (event.get("description") and kw in event["description"].lower()) or
+                any(kw in k.lower() for k in event.get("keywords") or [])):
+            return False
+    return True
+
+
+class StorageBackend(ABC):
+    """
+    存储后端接口
+
+    事件列表、评论、分析结果和相关事件均通过该接口读写，
+    路由层不再直接访问数据文件。
+    """
+
+    @abstractmethod
+    def is_initialized(self) -> bool:
+        """事件列表是否已保存过（即使为空或已损坏），用于判断是否需要写入示例数据"""
+
+    # 事件
+    @abstractmethod
+    def load_events(self) -> List[dict]:
+        """加载所有事件"""
+
+    @abstractmethod
+    def save_events(self, events: List[dict]) -> None:
+        """整体保存事件列表"""
+
+    @abstractmethod
+    def events_version(self) -> Optional[str]:
+        """返回事件列表的版本标识，任何事件变化后版本随之变化；尚未保存过事件时返回None"""
+
+    def get_event(self, event_id: int) -> Optional[dict]:
+        """按ID获取单个事件，不存在时返回None"""
+        return next((e for e in self.load_events() if e["id"] == event_id), None)
+
+    def insert_event(self, event: dict) -> dict:
+        """新增事件并分配ID（现有最大ID加1），返回保存的事件"""
+        events = self.load_events()
+        event = dict(event, id=max((e["id"] for e in events), default=0) + 1)
+        self.save_events(events + [event])
+        return event
+
+    def update_event(self, event_id: int, fields: dict) -> Optional[dict]:
+        """更新事件的部分字段，返回更新后的事件；不存在时返回None"""
+        events = self.load_events()
+        for i, event in enumerate(events):
+            if event["id"] == event_id:
+                events[i] = dict(event, **fields)
+                self.save_events(events)
+                return events[i]
+        return None
+
+    def delete_event(self, event_id: int) -> bool:
+        """删除事件，返回是否存在"""
+        events = self.load_events()
+        remaining = [e for e in events if e["id"] != event_id]
+        if len(remaining) == len(events):
+            return False
+        self.save_events(remaining)
+        return True
+
+    def query_events(self,
+                     category: Optional[str] = None,
+                     min_polarization: Optional[float] = None,
+                     max_polarization: Optional[float] = None,
+                     keyword: Optional[str] = None,
+                     skip: int = 0,
+                     limit: int = 100) -> List[dict]:
+        """按条件筛选事件并分页，默认实现在内存中过滤"""
+        events = [e for e in self.load_events()
+                  if match_event(e, category, min_polarization, max_polarization, keyword)]
+        return events[skip:skip + limit]
+
+    # 评论
+    @abstractmethod
+    def load_comments(self, event_id: int) -> Optional[List[dict]]:
+        """加载事件评论，不存在时返回None"""
+
+    @abstractmethod
+    def save_comments(self, event_id: int, comments: List[dict]) -> None:
+        """保存事件评论"""
+
+    @abstractmethod
+    def comments_version(self, event_id: int) -> Optional[str]:
+        """
+        返回事件评论数据的版本标识，评论变化后版本随之变化；不存在时返回None
+
+        版本在重建的数据存储之间也不应重复，分片清单和任务缓存以它判断数据是否变化。
+        """
+
+    # 分析结果
+    @abstractmethod
+    def load_analysis(self, event_id: int) -> Optional[Dict]:
+        """加载事件分析结果，不存在时返回None"""
+
+    @abstractmethod
+    def save_analysis(self, event_id: int, analysis_data: Dict) -> None:
+        """保存事件分析结果"""
+
+    # 相关事件
+    @abstractmethod
+    def load_related(self, event_id: int) -> Optional[Dict]:
+        """加载相关事件数据，不存在时返回None"""
+
+    @abstractmethod
+    def save_related(self, event_id: int, related_data: Dict) -> None:
+        """保存相关事件数据"""
+
+    def close(self) -> None:
+        """释放资源"""
@@ -0,0 +1,91 @@
+import glob
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+from app.metrics import storage_load
+from app.profiling import span
+from app.storage.base import StorageBackend
+
+
+class JsonStorage(StorageBackend):
+    """
+    基于JSON文件的存储后端（默认）
+
+    目录布局：
+      data/events/events.json
+      data/events/comments_{id}.json
+      data/analysis/results_{id}.json
+      data/analysis/related_{id}.json
+    """
+
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = data_dir
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.data_dir, *parts)
+
+    def _read(self, path: str, store: str):
+        with storage_load.time("json", store), span(f"storage.{store}"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return None
+
+    def _write(self, path: str, data) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def is_initialized(self) -> bool:
+        return os.path.exists(self._path("events", "events.json"))
+
+    def load_events(self) -> List[dict]:
+        return self._read(self._path("events", "events.json"), "events") or []
+
+    def save_events(self, events: List[dict]) -> None:
+        self._write(self._path("events", "events.json"), events)
+
+    def events_version(self) -> Optional[str]:
+        try:
+            st = os.stat(self._path("events", "events.json"))
+        except FileNotFoundError:
+            return None
+        return f"{st.st_mtime_ns}-{st.st_size}"
+
+    def load_comments(self, event_id: int) -> Optional[List[dict]]:
+        return self._read(self._path("events", f"comments_{event_id}.json"), "comments")
+
+    def save_comments(self, event_id: int, comments: List[dict]) -> None:
+        self._write(self._path("events", f"comments_{event_id}.json"), comments)
+
+    def comments_version(self, event_id: int) -> Optional[str]:
+        try:
+            st = os.stat(self._path("events", f"comments_{event_id}.json"))
+        except FileNotFoundError:
+            return None
+        return f"{st.st_mtime_ns}-{st.st_size}"
+
+    def load_analysis(self, event_id: int) -> Optional[Dict]:
+        return self._read(self._path("analysis", f"results_{event_id}.json"), "results")
+
+    def save_analysis(self, event_id: int, analysis_data: Dict) -> None:
+        self._write(self._path("analysis", f"results_{event_id}.json"), analysis_data)
+
+    def load_related(self, event_id: int) -> Optional[Dict]:
+        return self._read(self._path("analysis", f"related_{event_id}.json"), "related")
+
+    def save_related(self, event_id: int, related_data: Dict) -> None:
+        self._write(self._path("analysis", f"related_{event_id}.json"), related_data)
+
+    def stored_event_ids(self, subdir: str, prefix: str) -> List[int]:
+        """列出目录中形如 {prefix}_{id}.json 的文件对应的事件ID"""
+        pattern = re.compile(rf"^{prefix}_(\d+)\.json$")
+        ids = []
+        for path in glob.glob(self._path(subdir, f"{prefix}_*.json")):
+            m = pattern.match(os.path.basename(path))
+            if m:
+                ids.append(int(m.group(1)))
+        return sorted(ids)
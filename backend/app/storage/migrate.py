@@ -0,0 +1,58 @@
+"""
+将JSON数据目录迁移到SQLite数据库
+
+用法（在 backend 目录下执行）：
+    python -m app.storage.migrate --data-dir data --db data/netpolar.db
+"""
+import argparse
+from typing import Dict
+
+from app.storage.json_store import JsonStorage
+from app.storage.sqlite_store import SqliteStorage
+
+
+def migrate(data_dir: str, db_path: str) -> Dict[str, int]:
+    """执行迁移，返回各类数据的迁移数量"""
+    source = JsonStorage(data_dir)
+    target = SqliteStorage(db_path)
+    stats = {"events": 0, "comments": 0, "results": 0, "related": 0}
+    try:
+        events = source.load_events()
+        target.save_events(events)
+        stats["events"] = len(events)
+
+        for event_id in source.stored_event_ids("events", "comments"):
+            comments = source.load_comments(event_id)
+            if comments is not None:
+                target.save_comments(event_id, comments)
+                stats["comments"] += len(comments)
+
+        for event_id in source.stored_event_ids("analysis", "results"):
+            data = source.load_analysis(event_id)
+            if data is not None:
+                target.save_analysis(event_id, data)
+                stats["results"] += 1
+
+        for event_id in source.stored_event_ids("analysis", "related"):
+            data = source.load_related(event_id)
+            if data is not None:
+                target.save_related(event_id, data)
+                stats["related"] += 1
+    finally:
+        target.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="将JSON数据目录迁移到SQLite")
+    parser.add_argument("--data-dir", default="data", help="JSON数据目录")
+    parser.add_argument("--db", default="data/netpolar.db", help="SQLite数据库文件路径")
+    args = parser.parse_args()
+
+    stats = migrate(args.data_dir, args.db)
+    print(f"迁移完成: 事件 {stats['events']} 条, 评论 {stats['comments']} 条, "
+          f"分析结果 {stats['results']} 个, 相关事件 {stats['related']} 个")
+
+
+if __name__ == "__main__":
+    main()
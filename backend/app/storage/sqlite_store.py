@@ -0,0 +1,297 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from app.metrics import storage_load
+from app.profiling import span
+from app.storage.base import StorageBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    polarization_level REAL NOT NULL,
+    search_text TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_position ON events(position);
+CREATE INDEX IF NOT EXISTS idx_events_category ON events(category, position);
+CREATE INDEX IF NOT EXISTS idx_events_polarization ON events(polarization_level);
+
+CREATE TABLE IF NOT EXISTS comments (
+    event_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (event_id, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS comment_sets (
+    event_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS documents (
+    kind TEXT NOT NULL,
+    event_id INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (kind, event_id)
+) WITHOUT ROWID;
+"""
+
+# 事件筛选条件片段，按固定顺序拼接；组合数有限，
+# 每种组合的SQL文本固定，由sqlite3的语句缓存复用预编译结果
+_EVENT_FILTERS = (
+    ("category", "category = ?"),
+    ("min_polarization", "polarization_level >= ?"),
+    ("max_polarization", "polarization_level <= ?"),
+    ("keyword", "instr(search_text, ?) > 0"),
+)
+
+
+def _search_text(event: dict) -> str:
+    """构造关键词检索用的小写文本（标题、描述、关键词以换行分隔）"""
+    parts = [event.get("title") or "", event.get("description") or ""]
+    parts.extend(event.get("keywords") or [])
+    return "\n".join(p.lower() for p in parts)
+
+
+def _event_values(event: dict) -> tuple:
+    """事件行中除ID和位置以外的列：类别、极化程度、检索文本、完整JSON"""
+    return (event["category"], float(event["polarizationLevel"]),
+            _search_text(event), json.dumps(event, ensure_ascii=False))
+
+
+def _touch_events(conn: sqlite3.Connection) -> None:
+    """标记事件列表已初始化并递增其版本（在写事务中调用）"""
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('events_initialized', '1')")
+    conn.execute("INSERT INTO meta (key, value) VALUES ('events_version', '1') "
+                 "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+
+class _ConnectionPool:
+    """简单的SQLite连接池，WAL模式下允许多个读连接并发"""
+
+    def __init__(self, path: str, size: int):
+        self._path = path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._pool.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, check_same_thread=False,
+                               timeout=30, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+class SqliteStorage(StorageBackend):
+    """
+    嵌入式SQLite存储后端
+
+    使用WAL模式和连接池支持并发读取，写操作通过锁串行化；
+    事件列表的筛选和分页在SQL中完成，并使用索引。
+    """
+
+    def __init__(self, db_path: str = "data/netpolar.db", pool_size: int = 4):
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self._pool = _ConnectionPool(db_path, pool_size)
+        self._write_lock = threading.Lock()
+        with self._pool.connection() as conn:
+            conn.executescript(SCHEMA)
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)",
+                             (uuid.uuid4().hex,))
+            # 数据库的唯一标识，重建数据库后评论版本不会与旧数据库重复
+            self._epoch = conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+
+    @contextmanager
+    def _writer(self):
+        """获取写连接，在事务中执行"""
+        with self._write_lock, self._pool.connection() as conn:
+            with conn:
+                yield conn
+
+    def is_initialized(self) -> bool:
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'events_initialized'").fetchone()
+        return row is not None
+
+    # 事件
+    def load_events(self) -> List[dict]:
+        with storage_load.time("sqlite", "events"), span("storage.events"):
+            with self._pool.connection() as conn:
+                rows = conn.execute("SELECT body FROM events ORDER BY position").fetchall()
+            # 先归还连接再解析，避免解析大量JSON时占用连接池
+            return [json.loads(r[0]) for r in rows]
+
+    def save_events(self, events: List[dict]) -> None:
+        rows = [(e["id"], i, *_event_values(e)) for i, e in enumerate(events)]
+        with self._writer() as conn:
+            _touch_events(conn)
+            conn.execute("DELETE FROM events")
+            conn.executemany(
+                "INSERT INTO events (id, position, category, polarization_level, search_text, body) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def get_event(self, event_id: int) -> Optional[dict]:
+        with storage_load.time("sqlite", "event"), span("storage.event"):
+            with self._pool.connection() as conn:
+                row = conn.execute("SELECT body FROM events WHERE id = ?", (event_id,)).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def insert_event(self, event: dict) -> dict:
+        with self._writer() as conn:
+            new_id, position = conn.execute(
+                "SELECT COALESCE(MAX(id), 0) + 1, COALESCE(MAX(position), -1) + 1 FROM events"
+            ).fetchone()
+            event = dict(event, id=new_id)
+            _touch_events(conn)
+            conn.execute(
+                "INSERT INTO events (id, position, category, polarization_level, search_text, body) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (new_id, position, *_event_values(event)),
+            )
+        return event
+
+    def update_event(self, event_id: int, fields: dict) -> Optional[dict]:
+        with self._writer() as conn:
+            row = conn.execute("SELECT body FROM events WHERE id = ?", (event_id,)).fetchone()
+            if row is None:
+                return None
+            event = dict(json.loads(row[0]), **fields)
+            _touch_events(conn)
+            conn.execute(
+                "UPDATE events SET category = ?, polarization_level = ?, search_text = ?, body = ? "
+                "WHERE id = ?",
+                (*_event_values(event), event_id),
+            )
+        return event
+
+    def delete_event(self, event_id: int) -> bool:
+        with self._writer() as conn:
+            if conn.execute("DELETE FROM events WHERE id = ?", (event_id,)).rowcount == 0:
+                return False
+            _touch_events(conn)
+            return True
+
+    def events_version(self) -> Optional[str]:
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'events_version'").fetchone()
+        return f"{self._epoch}-{row[0]}" if row else None
+
+    def query_events(self,
+                     category: Optional[str] = None,
+                     min_polarization: Optional[float] = None,
+                     max_polarization: Optional[float] = None,
+                     keyword: Optional[str] = None,
+                     skip: int = 0,
+                     limit: int = 100) -> List[dict]:
+        values = {
+            "category": category or None,
+            "min_polarization": min_polarization,
+            "max_polarization": max_polarization,
+            "keyword": keyword.lower() if keyword else None,
+        }
+        clauses, params = [], []
+        for name, clause in _EVENT_FILTERS:
+            if values[name] is not None:
+                clauses.append(clause)
+                params.append(values[name])
+        sql = "SELECT body FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY position LIMIT ? OFFSET ?"
+        params.extend([limit, skip])
+        with storage_load.time("sqlite", "events_query"), span("storage.events_query"):
+            with self._pool.connection() as conn:
+                rows = conn.execute(sql, params).fetchall()
+            return [json.loads(r[0]) for r in rows]
+
+    # 评论
+    def load_comments(self, event_id: int) -> Optional[List[dict]]:
+        with storage_load.time("sqlite", "comments"), span("storage.comments"):
+            with self._pool.connection() as conn:
+                if conn.execute("SELECT 1 FROM comment_sets WHERE event_id = ?", (event_id,)).fetchone() is None:
+                    return None
+                rows = conn.execute(
+                    "SELECT body FROM comments WHERE event_id = ? ORDER BY position", (event_id,)
+                ).fetchall()
+            return [json.loads(r[0]) for r in rows]
+
+    def save_comments(self, event_id: int, comments: List[dict]) -> None:
+        with self._writer() as conn:
+            conn.execute("DELETE FROM comments WHERE event_id = ?", (event_id,))
+            conn.execute(
+                "INSERT INTO comment_sets (event_id, version) VALUES (?, 1) "
+                "ON CONFLICT(event_id) DO UPDATE SET version = version + 1",
+                (event_id,),
+            )
+            conn.executemany(
+                "INSERT INTO comments (event_id, position, body) VALUES (?, ?, ?)",
+                ((event_id, i, json.dumps(c, ensure_ascii=False)) for i, c in enumerate(comments)),
+            )
+
+    def comments_version(self, event_id: int) -> Optional[str]:
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT version FROM comment_sets WHERE event_id = ?", (event_id,)).fetchone()
+        return f"{self._epoch}-{row[0]}" if row else None
+
+    # 分析结果与相关事件
+    def _load_document(self, kind: str, event_id: int) -> Optional[Dict]:
+        with storage_load.time("sqlite", kind), span(f"storage.{kind}"):
+            with self._pool.connection() as conn:
+                row = conn.execute(
+                    "SELECT body FROM documents WHERE kind = ? AND event_id = ?", (kind, event_id)
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def _save_document(self, kind: str, event_id: int, data: Dict) -> None:
+        with self._writer() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (kind, event_id, body) VALUES (?, ?, ?)",
+                (kind, event_id, json.dumps(data, ensure_ascii=False)),
+            )
+
+    def load_analysis(self, event_id: int) -> Optional[Dict]:
+        return self._load_document("results", event_id)
+
+    def save_analysis(self, event_id: int, analysis_data: Dict) -> None:
+        self._save_document("results", event_id, analysis_data)
+
+    def load_related(self, event_id: int) -> Optional[Dict]:
+        return self._load_document("related", event_id)
+
+    def save_related(self, event_id: int, related_data: Dict) -> None:
+        self._save_document("related", event_id, related_data)
+
+    def close(self) -> None:
+        self._pool.close()
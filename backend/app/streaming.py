@@ -0,0 +1,224 @@
+"""
+流式极化估计
+
+按事件和平台维护评论立场的指数衰减统计和滑动窗口统计，每条评论O(1)更新，
+实时给出极化指数（PI）及其置信区间，无需重新扫描历史评论。
+
+极化指数定义为立场（-1~1）的方差：观点一致时接近0，两极对立时接近1。
+"""
+import math
+import threading
+import time
+from collections import deque
+from statistics import NormalDist
+from typing import Dict, Optional, Tuple
+
+# 全部平台汇总使用的平台名
+ALL_PLATFORMS = "all"
+# 全部事件汇总使用的事件ID
+ALL_EVENTS = "*"
+
+
+def _moments_pi(w: float, w2: float, s1: float, s2: float, s3: float, s4: float,
+                confidence: float) -> Optional[Dict]:
+    """
+    由加权幂和计算极化指数及置信区间
+
+    w为权重和，w2为权重平方和（用于有效样本量），s1~s4为加权的一至四次幂和。
+    """
+    if w <= 0:
+        return None
+    m1, m2, m3, m4 = s1 / w, s2 / w, s3 / w, s4 / w
+    variance = max(0.0, m2 - m1 * m1)
+    # 四阶中心矩
+    central4 = max(0.0, m4 - 4 * m1 * m3 + 6 * m1 * m1 * m2 - 3 * m1 ** 4)
+    n_eff = w * w / w2 if w2 > 0 else 0.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    stderr = math.sqrt(max(0.0, central4 - variance * variance) / n_eff) if n_eff > 1 else 1.0
+    return {
+        "pi": min(1.0, variance),
+        "lower": max(0.0, variance - z * stderr),
+        "upper": min(1.0, variance + z * stderr),
+        "mean_stance": m1,
+        "effective_n": n_eff,
+    }
+
+
+class SeriesStats:
+    """单个序列（事件×平台）的指数衰减统计与滑动窗口统计"""
+
+    __slots__ = ("half_life", "window_seconds", "window_size", "clock", "last_ts",
+                 "ew", "window", "win", "count")
+
+    def __init__(self, half_life: float, window_seconds: float, window_size: int):
+        self.half_life = half_life
+        self.window_seconds = window_seconds
+        self.window_size = window_size
+        # 衰减时钟：已衰减到的时刻（读取时也会推进）
+        self.clock: Optional[float] = None
+        # 最新一条数据的时间戳
+        self.last_ts: Optional[float] = None
+        # 指数衰减：[Σw, Σw², Σw·x, Σw·x², Σw·x³, Σw·x⁴]
+        self.ew = [0.0] * 6
+        # 滑动窗口：按时间排序的 (时间戳, 立场) 及 [n, Σx, Σx², Σx³, Σx⁴]
+        self.window: deque = deque()
+        self.win = [0.0] * 5
+        self.count = 0
+
+    def _decay(self, ts: float) -> None:
+        if self.clock is not None and ts > self.clock:
+            factor = 0.5 ** ((ts - self.clock) / self.half_life)
+            ew = self.ew
+            ew[1] *= factor * factor
+            for i in (0, 2, 3, 4, 5):
+                ew[i] *= factor
+        if self.clock is None or ts > self.clock:
+            self.clock = ts
+
+    def _evict(self, now: float) -> None:
+        window, win = self.window, self.win
+        while window and (window[0][0] < now - self.window_seconds or len(window) > self.window_size):
+            _, x = window.popleft()
+            win[0] -= 1
+            win[1] -= x
+            win[2] -= x * x
+            win[3] -= x ** 3
+            win[4] -= x ** 4
+
+    def update(self, stance: float, ts: float) -> None:
+        self._decay(ts)
+        # 晚到的评论按其时间戳到衰减时钟的间隔折算权重
+        weight = 0.5 ** ((self.clock - ts) / self.half_life) if ts < self.clock else 1.0
+        ew = self.ew
+        x2 = stance * stance
+        ew[0] += weight
+        ew[1] += weight * weight
+        ew[2] += weight * stance
+        ew[3] += weight * x2
+        ew[4] += weight * x2 * stance
+        ew[5] += weight * x2 * x2
+
+        # 已超出窗口的晚到评论不进入窗口；其余按时间顺序插入，保证从头部淘汰的是最早的评论
+        if ts >= self.clock - self.window_seconds:
+            window = self.window
+            if not window or ts >= window[-1][0]:
+                window.append((ts, stance))
+            else:
+                index = len(window) - 1
+                while index > 0 and window[index - 1][0] > ts:
+                    index -= 1
+                window.insert(index, (ts, stance))
+            win = self.win
+            win[0] += 1
+            win[1] += stance
+            win[2] += x2
+            win[3] += x2 * stance
+            win[4] += x2 * x2
+            self._evict(self.clock)
+        if self.last_ts is None or ts > self.last_ts:
+            self.last_ts = ts
+        self.count += 1
+
+    def snapshot(self, confidence: float, now: float) -> Dict:
+        self._decay(now)
+        self._evict(now)
+        w = self.win
+        return {
+            "count": self.count,
+            "last_update": self.last_ts,
+            "decayed": _moments_pi(*self.ew, confidence=confidence),
+            "window": _moments_pi(w[0], w[0], *w[1:], confidence=confidence),
+        }
+
+
+class StreamingPolarizationEstimator:
+    """
+    流式极化估计器
+
+    每条评论同时更新 (事件, 平台)、(事件, 全部平台)、(全部事件, 平台)、
+    (全部事件, 全部平台) 四个序列。最新数据比全部数据中最新的时间戳早 series_ttl 秒以上的序列被移除。
+    """
+
+    def __init__(self, half_life: float = 900.0, window_seconds: float = 3600.0,
+                 window_size: int = 10000, series_ttl: float = 6 * 3600.0):
+        self.half_life = half_life
+        self.window_seconds = window_seconds
+        self.window_size = window_size
+        self.series_ttl = series_ttl
+        self._series: Dict[Tuple[str, str], SeriesStats] = {}
+        self._lock = threading.Lock()
+        self._latest: Optional[float] = None
+        self._last_expiry: Optional[float] = None
+
+    def _get(self, key: Tuple[str, str]) -> SeriesStats:
+        stats = self._series.get(key)
+        if stats is None:
+            stats = SeriesStats(self.half_life, self.window_seconds, self.window_size)
+            self._series[key] = stats
+        return stats
+
+    def update(self, event_id, platform: str, stance: float, timestamp: Optional[float] = None) -> None:
+        """记录一条评论的立场（-1~1）"""
+        ts = time.time() if timestamp is None else timestamp
+        stance = max(-1.0, min(1.0, float(stance)))
+        event_key = str(event_id)
+        with self._lock:
+            for key in ((event_key, platform), (event_key, ALL_PLATFORMS),
+                        (ALL_EVENTS, platform), (ALL_EVENTS, ALL_PLATFORMS)):
+                self._get(key).update(stance, ts)
+            if self._latest is None or ts > self._latest:
+                self._latest = ts
+            # 每经过 series_ttl 的十分之一检查一次过期序列
+            if self._last_expiry is None or self._latest - self._last_expiry >= self.series_ttl / 10:
+                self._expire()
+
+    def _expire(self) -> None:
+        cutoff = self._latest - self.series_ttl
+        self._series = {k: v for k, v in self._series.items() if v.last_ts >= cutoff}
+        self._last_expiry = self._latest
+
+    def has_data(self, event_id=ALL_EVENTS, platform: str = ALL_PLATFORMS) -> bool:
+        return (str(event_id), platform) in self._series
+
+    def snapshot(self, event_id=ALL_EVENTS, platform: str = ALL_PLATFORMS,
+                 confidence: float = 0.95, now: Optional[float] = None) -> Optional[Dict]:
+        """获取某个序列的实时极化指数；没有数据时返回None"""
+        now = time.time() if now is None else now
+        with self._lock:
+            stats = self._series.get((str(event_id), platform))
+            if stats is None:
+                return None
+            return stats.snapshot(confidence, now)
+
+    def live_pi(self, event_id=ALL_EVENTS, platform: str = ALL_PLATFORMS,
+                confidence: float = 0.95) -> Optional[Dict]:
+        """实时极化指数（指数衰减估计），没有数据时返回None"""
+        snap = self.snapshot(event_id, platform, confidence)
+        return snap["decayed"] if snap else None
+
+    def series_values(self, confidence: float = 0.95) -> Dict[Tuple[str, str], float]:
+        """所有序列当前的实时极化指数"""
+        with self._lock:
+            keys = list(self._series)
+        result = {}
+        for event_key, platform in keys:
+            pi = self.live_pi(event_key, platform, confidence)
+            if pi is not None:
+                result[(event_key, platform)] = pi["pi"]
+        return result
+
+    def platforms(self, event_id=ALL_EVENTS) -> Dict[str, Dict]:
+        """某事件各平台的实时极化指数"""
+        event_key = str(event_id)
+        with self._lock:
+            keys = [k for k in self._series if k[0] == event_key and k[1] != ALL_PLATFORMS]
+        result = {}
+        for _, platform in keys:
+            pi = self.live_pi(event_key, platform)
+            if pi is not None:
+                result[platform] = pi
+        return result
+
+
+# 全局流式估计器
+estimator = StreamingPolarizationEstimator()
@@ -0,0 +1,96 @@
+"""
+基准测试命令行
+
+    python -m benchmarks generate --data-dir bench_data --events 100000 --comments 10000000
+    python -m benchmarks micro --data-dir bench_data --output micro.json
+    python -m benchmarks load --data-dir bench_data --duration 30 --concurrency 50 --ws-clients 200
+    python -m benchmarks all --events 1000 --comments 10000 --output bench.json
+    python -m benchmarks.compare baseline.json bench.json --threshold 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+from benchmarks.datagen import generate_dataset
+
+META_FILE = "bench_meta.json"
+
+
+def _load_meta(data_dir: str) -> dict:
+    with open(os.path.join(data_dir, META_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def cmd_generate(args) -> dict:
+    meta = generate_dataset(args.data_dir, args.events, args.comments, args.comment_events, args.seed)
+    with open(os.path.join(args.data_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    print(f"已生成 {meta['events']} 个事件、{meta['comments']} 条评论 -> {args.data_dir}")
+    return meta
+
+
+def cmd_micro(args) -> dict:
+    from benchmarks.micro import run_micro
+    meta = _load_meta(args.data_dir)
+    return run_micro(args.data_dir, meta["hottestEvent"], args.repeat)
+
+
+def cmd_load(args) -> dict:
+    from benchmarks.loadgen import run_load
+    from benchmarks.micro import configure
+    meta = _load_meta(args.data_dir)
+    configure(args.data_dir)
+    from app.main import app
+    event_ids = list(range(1, meta["events"] + 1))
+    return asyncio.run(run_load(app, args.duration, args.concurrency, args.ws_clients,
+                                event_ids, meta["hottestEvent"]))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="NetPolarPredict基准测试")
+    parser.add_argument("command", choices=["generate", "micro", "load", "all"])
+    parser.add_argument("--data-dir", default="bench_data", help="合成数据目录")
+    # 默认规模用于快速冒烟测试，完整规模的测试需显式指定（见模块说明）
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--comments", type=int, default=10000)
+    parser.add_argument("--comment-events", type=int, default=1000, help="有评论的事件数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20, help="微基准重复次数")
+    parser.add_argument("--duration", type=float, default=30.0, help="负载测试时长（秒）")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发HTTP请求数")
+    parser.add_argument("--ws-clients", type=int, default=200, help="WebSocket客户端数")
+    parser.add_argument("--output", help="结果JSON文件")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        }
+    }
+    if args.command in ("generate", "all"):
+        report["meta"]["dataset"] = cmd_generate(args)
+    else:
+        report["meta"]["dataset"] = _load_meta(args.data_dir)
+    if args.command in ("micro", "all"):
+        report["micro"] = cmd_micro(args)
+    if args.command in ("load", "all"):
+        report["load"] = cmd_load(args)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"结果已写入 {args.output}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
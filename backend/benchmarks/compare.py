@@ -0,0 +1,63 @@
+"""
+比较两次基准测试结果，延迟回退超过阈值时以非零状态退出（可用于CI）
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.2
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Tuple
+
+METRICS = ("p50_ms", "p99_ms")
+
+
+def _latencies(report: Dict) -> Iterator[Tuple[str, Dict]]:
+    for name, stats in report.get("micro", {}).items():
+        yield f"micro.{name}", stats
+    http = report.get("load", {}).get("http", {})
+    for name, stats in http.get("endpoints", {}).items():
+        yield f"load.{name}", stats
+
+
+def compare(baseline: Dict, current: Dict, threshold: float):
+    """返回 [(名称, 指标, 基线值, 当前值, 变化比例, 是否回退)]"""
+    base = dict(_latencies(baseline))
+    rows = []
+    for name, stats in _latencies(current):
+        if name not in base:
+            continue
+        for metric in METRICS:
+            old, new = base[name].get(metric), stats.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            rows.append((name, metric, old, new, change, change > threshold))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的延迟增长比例")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    regressions = 0
+    for name, metric, old, new, change, regressed in rows:
+        mark = "回退" if regressed else ""
+        regressions += regressed
+        print(f"{name:45s} {metric:7s} {old:10.2f} -> {new:10.2f} ({change:+.1%}) {mark}")
+    if regressions:
+        print(f"{regressions} 项延迟回退超过 {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+按现有数据目录布局生成合成数据
+
+    data/events/events.json
+    data/events/comments_{id}.json
+
+评论按Zipf分布集中在最热的若干事件上，与真实热点事件的评论分布相近。
+"""
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+CATEGORIES = ["科技", "医疗", "政治", "经济", "社会", "文化", "教育", "环境"]
+SOURCES = ["新浪微博", "知乎", "抖音", "微信", "Twitter", "Reddit"]
+KEYWORDS = ["监管", "疫苗", "公共健康", "企业道德", "教育公平", "房价", "就业", "环保",
+            "人工智能", "隐私", "食品安全", "交通", "医保", "网络安全", "气候"]
+WORDS = ["支持", "反对", "理性", "看看", "证据", "炒作", "严惩", "呼吁", "真相", "媒体", "监管", "希望"]
+
+
+def _write_json_array(path: str, items) -> None:
+    """逐条写出JSON数组，避免一次性构造超大字符串"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, item in enumerate(items):
+            if i:
+                f.write(",")
+            f.write(json.dumps(item, ensure_ascii=False))
+        f.write("]")
+
+
+def generate_events(count: int, rng: np.random.Generator):
+    categories = rng.integers(0, len(CATEGORIES), count)
+    sources = rng.integers(0, len(SOURCES), count)
+    polarization = np.round(rng.uniform(0, 10, count), 1)
+    hot = np.round(rng.uniform(0, 10, count), 1)
+    days = rng.integers(1, 29, count)
+    for i in range(count):
+        kw = rng.choice(len(KEYWORDS), 3, replace=False)
+        yield {
+            "id": i + 1,
+            "title": f"合成事件{i + 1}：{KEYWORDS[kw[0]]}引发争议",
+            "category": CATEGORIES[categories[i]],
+            "date": f"2025-04-{days[i]:02d}",
+            "source": SOURCES[sources[i]],
+            "commentCount": 0,
+            "polarizationLevel": float(polarization[i]),
+            "hotLevel": float(hot[i]),
+            "description": f"关于{KEYWORDS[kw[1]]}和{KEYWORDS[kw[2]]}的讨论持续发酵。",
+            "keywords": [KEYWORDS[k] for k in kw],
+        }
+
+
+def comment_distribution(events: int, comments: int, comment_events: int,
+                         rng: np.random.Generator, exponent: float = 1.1) -> np.ndarray:
+    """将评论总数按Zipf分布分配到最热的comment_events个事件上"""
+    k = min(events, comment_events)
+    weights = 1.0 / np.arange(1, k + 1) ** exponent
+    return rng.multinomial(comments, weights / weights.sum())
+
+
+def generate_comments(event_id: int, count: int, rng: np.random.Generator):
+    users = max(1, count // 5)
+    user_ids = rng.integers(0, users, count)
+    # 用户立场两极分化：一半用户偏支持，一半偏反对
+    sentiment = np.clip(np.where(user_ids % 2 == 0, 0.6, -0.6) + rng.normal(0, 0.35, count), -1, 1)
+    likes = rng.zipf(2.0, count)
+    reply = rng.random(count) < 0.6
+    # 回复目标为之前的任意一条评论
+    reply_to = (rng.random(count) * np.arange(count)).astype(np.int64)
+    words = rng.integers(0, len(WORDS), (count, 3))
+    for i in range(count):
+        comment = {
+            "id": f"{event_id}-{i}",
+            "userId": f"u{event_id}-{user_ids[i]}",
+            "content": "".join(WORDS[w] for w in words[i]),
+            "sentiment": round(float(sentiment[i]), 3),
+            "date": "2025-04-25 09:00:00",
+            "likes": int(min(likes[i], 100000)),
+        }
+        if reply[i] and i:
+            comment["replyTo"] = f"{event_id}-{reply_to[i]}"
+        yield comment
+
+
+def generate_dataset(data_dir: str, events: int, comments: int,
+                     comment_events: int = 1000, seed: int = 0) -> Dict:
+    """生成合成数据集，返回数据规模说明"""
+    rng = np.random.default_rng(seed)
+    events_dir = os.path.join(data_dir, "events")
+    os.makedirs(events_dir, exist_ok=True)
+    os.makedirs(os.path.join(data_dir, "analysis"), exist_ok=True)
+
+    counts = comment_distribution(events, comments, comment_events, rng)
+    comment_counts: Dict[int, int] = {}
+    for idx, n in enumerate(counts):
+        if n:
+            event_id = idx + 1
+            comment_counts[event_id] = int(n)
+            _write_json_array(os.path.join(events_dir, f"comments_{event_id}.json"),
+                              generate_comments(event_id, int(n), rng))
+
+    def events_with_counts():
+        for event in generate_events(events, rng):
+            event["commentCount"] = comment_counts.get(event["id"], 0)
+            yield event
+
+    _write_json_array(os.path.join(events_dir, "events.json"), events_with_counts())
+    hottest: Optional[int] = max(comment_counts, key=comment_counts.get) if comment_counts else None
+    return {
+        "events": events,
+        "comments": comments,
+        "eventsWithComments": len(comment_counts),
+        "hottestEvent": hottest,
+        "hottestEventComments": comment_counts.get(hottest, 0) if hottest else 0,
+        "seed": seed,
+    }
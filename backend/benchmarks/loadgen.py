@@ -0,0 +1,208 @@
+"""
+进程内负载生成器
+
+直接通过ASGI接口驱动应用（不经过网络），并发请求HTTP端点，
+同时维持N个 /api/monitor/monitor/ws 客户端，统计吞吐量和延迟。
+由于负载生成器与应用共享同一事件循环，结果反映的是应用自身（含中间件）的处理能力。
+"""
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.stats import summarize
+
+
+def _scope(scope_type: str, path: str, query: str = "", method: str = "GET") -> dict:
+    scope = {
+        "type": scope_type,
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "scheme": "http" if scope_type == "http" else "ws",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    if scope_type == "http":
+        scope["method"] = method
+    return scope
+
+
+async def asgi_request(app, method: str, path: str, query: str = "", body=None) -> Tuple[int, bytes]:
+    """向ASGI应用发送一个HTTP请求，返回 (状态码, 响应体)"""
+    payload = json.dumps(body).encode() if body is not None else b""
+    request_sent = False
+    response_done = asyncio.Event()
+    status = 0
+    chunks: List[bytes] = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(_scope("http", path, query, method), receive, send)
+    return status, b"".join(chunks)
+
+
+class AsgiWebSocketClient:
+    """通过ASGI接口连接应用WebSocket端点的客户端，记录收到的推送"""
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self.accepted = asyncio.Event()
+        self.messages = 0
+        self.latencies: List[float] = []
+
+    async def _receive(self):
+        return await self._to_app.get()
+
+    async def _send(self, message):
+        if message["type"] == "websocket.accept":
+            self.accepted.set()
+        elif message["type"] == "websocket.send" and message.get("text"):
+            self.messages += 1
+            try:
+                data = json.loads(message["text"])
+                sent_at = datetime.fromisoformat(data["timestamp"])
+                self.latencies.append((datetime.now() - sent_at).total_seconds())
+            except (ValueError, KeyError, TypeError):
+                pass
+
+    async def connect(self):
+        await self._to_app.put({"type": "websocket.connect"})
+        self._task = asyncio.create_task(self.app(_scope("websocket", self.path), self._receive, self._send))
+        await asyncio.wait_for(self.accepted.wait(), timeout=10)
+
+    async def close(self):
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except (asyncio.TimeoutError, Exception):
+                self._task.cancel()
+
+
+class Lifespan:
+    """通过ASGI lifespan协议执行应用的startup/shutdown事件"""
+
+    def __init__(self, app):
+        self.app = app
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _send(self, message):
+        await self._events.put(message["type"])
+
+    async def _step(self, name: str) -> None:
+        await self._to_app.put({"type": f"lifespan.{name}"})
+        result = await asyncio.wait_for(self._events.get(), timeout=30)
+        if result != f"lifespan.{name}.complete":
+            raise RuntimeError(f"应用{name}失败: {result}")
+
+    async def startup(self) -> None:
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}}
+        self._task = asyncio.create_task(self.app(scope, self._to_app.get, self._send))
+        await self._step("startup")
+
+    async def shutdown(self) -> None:
+        await self._step("shutdown")
+        await self._task
+
+
+def default_requests(event_ids: List[int], hot_event: Optional[int]
+                     ) -> List[Tuple[str, str, str, str, Optional[dict]]]:
+    """负载中的请求组合：(名称, 方法, 路径, 查询字符串, 请求体)；没有评论数据时不请求评论分析"""
+    event_id = random.choice(event_ids)
+    requests = [
+        ("events_list", "GET", "/api/events/", "limit=20", None),
+        ("events_filtered", "GET", "/api/events/", "category=%E7%A7%91%E6%8A%80&min_polarization=5", None),
+        ("event_detail", "GET", f"/api/events/{event_id}", "", None),
+        ("event_analysis", "GET", f"/api/analysis/events/{event_id}", "", None),
+        ("prediction", "POST", "/api/prediction/prediction/polarization-index", "",
+         {"event_id": str(hot_event or event_id), "prediction_horizon": 24}),
+        ("monitor_statistics", "GET", "/api/monitor/monitor/statistics", "", None),
+    ]
+    if hot_event is not None:
+        requests.append(("comments_analysis", "GET", f"/api/analysis/comments/{hot_event}", "limit=20", None))
+    return requests
+
+
+async def run_load(app, duration: float, concurrency: int, ws_clients: int,
+                   event_ids: List[int], hot_event: Optional[int], update_interval: int = 1) -> Dict:
+    """
+    在duration秒内以concurrency个并发工作协程请求HTTP端点，
+    同时保持ws_clients个WebSocket连接，返回吞吐量与延迟统计
+    """
+    from app.routers import monitor
+
+    monitor.monitoring_settings.update_interval = update_interval
+    lifespan = Lifespan(app)
+    await lifespan.startup()
+
+    clients = [AsgiWebSocketClient(app, "/api/monitor/monitor/ws") for _ in range(ws_clients)]
+    await asyncio.gather(*(c.connect() for c in clients))
+
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            name, method, path, query, body = random.choice(default_requests(event_ids, hot_event))
+            start = time.perf_counter()
+            status, _ = await asgi_request(app, method, path, query, body)
+            elapsed = time.perf_counter() - start
+            if status >= 400:
+                errors[name] = errors.get(name, 0) + 1
+            latencies.setdefault(name, []).append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    await asyncio.gather(*(c.close() for c in clients))
+    ws_latencies = [l for c in clients for l in c.latencies]
+    ws_messages = sum(c.messages for c in clients)
+    await lifespan.shutdown()
+
+    all_latencies = [l for values in latencies.values() for l in values]
+    return {
+        "duration_s": elapsed,
+        "concurrency": concurrency,
+        "http": {
+            "requests": len(all_latencies),
+            "throughput_rps": len(all_latencies) / elapsed if elapsed else 0.0,
+            "errors": errors,
+            "overall": summarize(all_latencies),
+            "endpoints": {name: summarize(values) for name, values in latencies.items()},
+        },
+        "websocket": {
+            "clients": ws_clients,
+            "messages": ws_messages,
+            "messages_per_s": ws_messages / elapsed if elapsed else 0.0,
+            "delivery": summarize(ws_latencies),
+        },
+    }
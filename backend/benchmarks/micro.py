@@ -0,0 +1,64 @@
+"""
+核心函数的微基准测试
+"""
+import asyncio
+import os
+import shutil
+from typing import Dict, Optional
+
+from benchmarks.stats import measure
+
+
+def configure(data_dir: str) -> None:
+    """让应用使用指定的数据目录（需在导入路由模块前后均可调用）"""
+    os.environ["NETPOLAR_DATA_DIR"] = data_dir
+    from app.jobs import JobStore, job_queue
+    from app.storage import JsonStorage, set_storage
+    set_storage(JsonStorage(data_dir))
+    job_queue.set_store(JobStore(os.path.join(data_dir, "jobs.db")))
+
+
+def run_micro(data_dir: str, hot_event: Optional[int], repeat: int = 20) -> Dict:
+    configure(data_dir)
+    from app.routers import analysis, events, monitor
+    from app.routers.prediction import predict_polarization_index
+    from app.sharding import shards
+
+    loop = asyncio.new_event_loop()
+    run = loop.run_until_complete
+    results = {}
+    try:
+        results["load_events"] = measure(events.load_events, repeat)
+
+        filters = {
+            "all": {},
+            "category": {"category": "科技"},
+            "polarization_range": {"min_polarization": 3.0, "max_polarization": 7.0},
+            "keyword": {"keyword": "疫苗"},
+            "combined": {"category": "医疗", "min_polarization": 5.0, "keyword": "监管"},
+        }
+        for name, params in filters.items():
+            kwargs = {"category": None, "min_polarization": None, "max_polarization": None,
+                      "keyword": None, "skip": 0, "limit": 100, **params}
+            results[f"get_events[{name}]"] = measure(lambda: run(events.get_events(**kwargs)), repeat)
+
+        def comments_analysis():
+            return run(analysis.get_comments_analysis(event_id=hot_event, limit=20, sort_by="polarization"))
+
+        def reset_comment_cache():
+            shards._merged_cache.pop(hot_event, None)
+            shutil.rmtree(os.path.join(shards.shard_root(), str(hot_event)), ignore_errors=True)
+
+        # 数据集中没有评论时跳过依赖评论的基准
+        if hot_event is not None:
+            reset_comment_cache()
+            results["get_comments_analysis[cold]"] = measure(comments_analysis, 1, warmup=0)
+            results["get_comments_analysis[warm]"] = measure(comments_analysis, repeat)
+
+            results["predict_polarization_index"] = measure(
+                lambda: predict_polarization_index(str(hot_event), 24, 0.95), repeat)
+        results["generate_monitoring_data"] = measure(lambda: run(monitor.generate_monitoring_data()), repeat)
+    finally:
+        shards.shutdown_executor()
+        loop.close()
+    return results
@@ -0,0 +1,36 @@
+import math
+import time
+from typing import Callable, Dict, List
+
+
+def summarize(samples: List[float]) -> Dict:
+    """延迟样本（秒）的统计，输出毫秒"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        idx = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+        return ordered[idx] * 1000
+
+    return {
+        "count": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def measure(func: Callable[[], object], repeat: int, warmup: int = 1) -> Dict:
+    """重复执行func并统计耗时"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
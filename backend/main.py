@@ -2,8 +2,10 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import os
-import json
-from app.routers import events, analysis, prediction, monitor
+from app.routers import events, analysis, prediction, monitor, admin, jobs
+from app.metrics import instrument_app
+from app.profiling import instrument_app as instrument_profiling
+from app.storage import get_storage
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -21,11 +23,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 请求剖析（按需开启）、请求指标与 /metrics 端点
+instrument_profiling(app)
+instrument_app(app)
+
 # 包含路由器
 app.include_router(events.router, prefix="/api/events", tags=["events"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"])
 app.include_router(prediction.router, prefix="/api/prediction", tags=["prediction"])
 app.include_router(monitor.router, prefix="/api/monitor", tags=["monitor"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 
 @app.get("/")
 async def root():
@@ -42,8 +50,9 @@ async def startup_event():
     os.makedirs("data/processed", exist_ok=True)
     os.makedirs("data/analysis", exist_ok=True)
     
-    # 初始化示例数据(如果不存在)
-    if not os.path.exists("data/events/events.json"):
+    # 初始化示例数据(如果从未保存过事件；已有但为空或损坏的数据不覆盖)
+    storage = get_storage()
+    if not storage.is_initialized():
         sample_events = [
             {
                 "id": 1,
@@ -70,8 +79,7 @@ async def startup_event():
                 "keywords": ["新冠疫苗", "接种", "公共健康", "副作用", "个人选择"]
             }
         ]
-        with open("data/events/events.json", "w", encoding="utf-8") as f:
-            json.dump(sample_events, f, ensure_ascii=False, indent=2)
+        storage.save_events(sample_events)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
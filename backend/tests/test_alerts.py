@@ -0,0 +1,105 @@
+import numpy as np
+
+from app.alerts import AlertEngine, AlertRule, EvaluationPlan
+
+KEY = ("1", "weibo")
+
+
+def _categories():
+    return {"1": "科技", "2": "医疗"}
+
+
+def test_plan_fires_once_and_resolves_below_hysteresis():
+    rule = AlertRule(rule_id="r", threshold=0.7, hysteresis=0.1)
+    plan = EvaluationPlan([rule], [KEY], _categories())
+
+    def step(value):
+        fired, resolved = plan.evaluate(np.array([[value], [np.nan], [np.nan]]))
+        return len(fired), len(resolved)
+
+    assert step(0.5) == (0, 0)
+    assert step(0.8) == (1, 0)
+    assert step(0.9) == (0, 0)
+    # 阈值与 threshold - hysteresis 之间保持触发
+    assert step(0.65) == (0, 0)
+    assert step(0.75) == (0, 0)
+    assert step(0.55) == (0, 1)
+    assert step(0.65) == (0, 0)
+    assert step(0.8) == (1, 0)
+
+
+def test_engine_alert_lifecycle():
+    engine = AlertEngine()
+    engine.set_rule(AlertRule(rule_id="r", threshold=0.7, hysteresis=0.1, category="科技"))
+    other = ("2", "weibo")
+
+    fired, resolved = engine.evaluate({KEY: 0.8, other: 0.9}, _categories)
+    assert [(a["rule_id"], a["event_id"]) for a in fired] == [("r", "1")]
+    assert resolved == []
+
+    fired, resolved = engine.evaluate({KEY: 0.65, other: 0.9}, _categories)
+    assert fired == [] and resolved == []
+    assert len(engine.open_alerts()) == 1
+
+    fired, resolved = engine.evaluate({KEY: 0.5, other: 0.9}, _categories)
+    assert fired == []
+    assert [a["status"] for a in resolved] == ["已解除"]
+    assert engine.open_alerts() == []
+
+    fired, _ = engine.evaluate({KEY: 0.8, other: 0.9}, _categories)
+    assert len(fired) == 1
+    assert fired[0]["alert_id"] != resolved[0]["alert_id"]
+
+
+def test_replacing_rule_keeps_open_alert():
+    engine = AlertEngine()
+    engine.set_rule(AlertRule(rule_id="r", threshold=0.7))
+    engine.evaluate({KEY: 0.8}, _categories)
+    engine.set_rule(AlertRule(rule_id="r", threshold=0.7, description="替换后的规则"))
+    fired, resolved = engine.evaluate({KEY: 0.8}, _categories)
+    assert fired == [] and resolved == []
+    assert len(engine.open_alerts()) == 1
+
+
+def test_rate_of_change_rule():
+    engine = AlertEngine()
+    engine.set_rule(AlertRule(rule_id="rate", kind="rate_of_change", threshold=0.2, hysteresis=0.0))
+    assert engine.evaluate({KEY: 0.3}, _categories) == ([], [])
+    fired, _ = engine.evaluate({KEY: 0.6}, _categories)
+    assert [a["kind"] for a in fired] == ["rate_of_change"]
+    _, resolved = engine.evaluate({KEY: 0.55}, _categories)
+    assert len(resolved) == 1
+
+
+def test_event_categories_cached_until_events_change(tmp_path, monkeypatch):
+    from app.routers import monitor
+    from app.storage import SqliteStorage, set_storage
+
+    store = SqliteStorage(str(tmp_path / "netpolar.db"))
+    store.save_events([{"id": 1, "category": "科技", "polarizationLevel": 1.0, "title": "a"}])
+    set_storage(store)
+    loads = []
+    original = store.load_events
+    monkeypatch.setattr(store, "load_events", lambda: loads.append(1) or original())
+    monkeypatch.setattr(monitor, "_categories_cache", None)
+    try:
+        assert monitor.event_categories() == {"1": "科技"}
+        assert monitor.event_categories() == {"1": "科技"}
+        assert len(loads) == 1
+        store.update_event(1, {"category": "医疗"})
+        assert monitor.event_categories() == {"1": "医疗"}
+        assert len(loads) == 2
+    finally:
+        set_storage(None)
+
+
+def test_forecast_cache_is_bounded(monkeypatch):
+    from app.routers import monitor
+
+    monkeypatch.setattr(monitor, "FORECAST_CACHE_SIZE", 3)
+    monkeypatch.setattr(monitor, "forecast_cache", monitor.OrderedDict())
+    monkeypatch.setattr(monitor, "predict_polarization_index",
+                        lambda event_id, horizon, confidence: {"predicted_pi": float(event_id) / 10})
+    for event_id in ["1", "2", "3", "1", "4"]:
+        assert monitor.forecast_pi(event_id) == float(event_id) / 10
+    assert list(monitor.forecast_cache) == ["3", "1", "4"]
@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from app.jobs import job_queue
+from app.storage import set_storage
+from benchmarks import compare
+from benchmarks.datagen import generate_dataset
+
+
+def _files(data_dir):
+    result = {}
+    for root, _, names in os.walk(data_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                result[os.path.relpath(path, data_dir)] = f.read()
+    return result
+
+
+def test_datagen_is_deterministic(tmp_path):
+    first = generate_dataset(str(tmp_path / "a"), 20, 300, comment_events=5, seed=7)
+    second = generate_dataset(str(tmp_path / "b"), 20, 300, comment_events=5, seed=7)
+    assert first == second
+    assert _files(tmp_path / "a") == _files(tmp_path / "b")
+    assert first["eventsWithComments"] <= 5
+    assert first["hottestEvent"] == 1
+
+    other = generate_dataset(str(tmp_path / "c"), 20, 300, comment_events=5, seed=8)
+    assert _files(tmp_path / "c") != _files(tmp_path / "a")
+    assert other["seed"] == 8
+
+    with open(tmp_path / "a" / "events" / "events.json", encoding="utf-8") as f:
+        events = json.load(f)
+    assert len(events) == 20
+    assert sum(e["commentCount"] for e in events) == 300
+
+
+@pytest.fixture
+def restore_globals(monkeypatch):
+    store = job_queue._store
+    monkeypatch.delenv("NETPOLAR_DATA_DIR", raising=False)
+    yield
+    job_queue.set_store(store)
+    set_storage(None)
+
+
+def test_micro_without_comments(tmp_path, restore_globals):
+    from benchmarks.micro import run_micro
+
+    meta = generate_dataset(str(tmp_path), 5, 0, seed=0)
+    assert meta["hottestEvent"] is None
+    results = run_micro(str(tmp_path), meta["hottestEvent"], repeat=1)
+    assert "load_events" in results
+    assert not any(name.startswith("get_comments_analysis") for name in results)
+
+
+def _report(micro, endpoints):
+    return {"micro": {k: {"p50_ms": v[0], "p99_ms": v[1]} for k, v in micro.items()},
+            "load": {"http": {"endpoints": {k: {"p50_ms": v[0], "p99_ms": v[1]} for k, v in endpoints.items()}}}}
+
+
+def test_compare_flags_regressions(tmp_path):
+    baseline = _report({"load_events": (10.0, 20.0), "removed": (1.0, 1.0)}, {"events_list": (5.0, 8.0)})
+    current = _report({"load_events": (11.0, 30.0), "added": (1.0, 1.0)}, {"events_list": (4.0, 8.0)})
+
+    rows = compare.compare(baseline, current, 0.2)
+    assert [(name, metric, regressed) for name, metric, _, _, _, regressed in rows] == [
+        ("micro.load_events", "p50_ms", False),
+        ("micro.load_events", "p99_ms", True),
+        ("load.events_list", "p50_ms", False),
+        ("load.events_list", "p99_ms", False),
+    ]
+    assert rows[1][4] == pytest.approx(0.5)
+
+    paths = []
+    for name, report in (("baseline", baseline), ("current", current)):
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps(report), encoding="utf-8")
+        paths.append(str(path))
+    assert compare.main(paths + ["--threshold", "0.2"]) == 1
+    assert compare.main(paths + ["--threshold", "0.6"]) == 0
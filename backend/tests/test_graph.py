@@ -0,0 +1,101 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.graph import service
+from app.graph.builder import InteractionGraph, build_interaction_graph, csr_from_edges
+from app.graph.polarization import label_propagation, modularity, random_walk_controversy
+from app.storage import JsonStorage, set_storage
+
+
+def _graph(n, edges, stance=None):
+    src, dst = zip(*edges) if edges else ((), ())
+    indptr, indices, weights = csr_from_edges(n, np.array(src), np.array(dst))
+    stance = np.zeros(n) if stance is None else np.array(stance, dtype=np.float64)
+    return InteractionGraph([f"u{i}" for i in range(n)], indptr, indices, weights, stance)
+
+
+def _neighbors(graph, i):
+    start, end = graph.indptr[i], graph.indptr[i + 1]
+    return dict(zip(graph.indices[start:end].tolist(), graph.weights[start:end].tolist()))
+
+
+# 两个三角形由一条边(2, 3)相连
+TWO_TRIANGLES = [(0, 1), (1, 2), (0, 2), (2, 3), (3, 4), (4, 5), (3, 5)]
+
+
+def test_csr_merges_duplicates_and_drops_self_loops():
+    graph = _graph(4, [(0, 1), (1, 0), (0, 2), (2, 2)])
+    assert graph.edge_count == 2
+    assert _neighbors(graph, 0) == {1: 2.0, 2: 1.0}
+    assert _neighbors(graph, 1) == {0: 2.0}
+    assert _neighbors(graph, 2) == {0: 1.0}
+    assert _neighbors(graph, 3) == {}
+    assert graph.degree().tolist() == [3.0, 2.0, 1.0, 0.0]
+
+
+def test_build_interaction_graph_from_replies_and_mentions():
+    comments = [
+        {"id": 1, "userId": "a", "content": "首条", "stance": 0.8},
+        {"id": 2, "userId": "b", "content": "回复", "replyTo": 1, "sentiment": "negative"},
+        {"id": 3, "userId": "a", "content": "@c 你怎么看", "stance": 0.4},
+    ]
+    graph = build_interaction_graph(comments)
+    assert graph.users == ["a", "b", "c"]
+    assert _neighbors(graph, 0) == {1: 1.0, 2: 1.0}
+    assert graph.stance.tolist() == pytest.approx([0.6, -1.0, 0.0])
+
+
+def test_label_propagation_finds_two_cliques():
+    cliques = [(i, j) for base in (0, 4) for i in range(base, base + 4) for j in range(i + 1, base + 4)]
+    graph = _graph(8, cliques + [(3, 4)])
+    labels = label_propagation(graph, max_iter=50)
+    assert len(set(labels[:4])) == 1
+    assert len(set(labels[4:])) == 1
+    assert labels[0] != labels[4]
+    assert labels.tolist() == label_propagation(graph, max_iter=50).tolist()
+
+
+def test_modularity_matches_hand_computed_value():
+    graph = _graph(6, TWO_TRIANGLES)
+    labels = np.array([0, 0, 0, 1, 1, 1])
+    # 每个社区内3条边、度之和7，m=7：Q = 2 * (3/7 - (7/14)^2)
+    assert modularity(graph, labels) == pytest.approx(2 * (3 / 7 - 0.25))
+    assert modularity(graph, np.zeros(6, dtype=np.int64)) == pytest.approx(0.0)
+
+
+def test_rwc_separated_sides():
+    graph = _graph(6, TWO_TRIANGLES)
+    side = np.array([1, 1, 1, -1, -1, -1])
+    # 吸收节点为两侧度最高的2和3，其余节点的游走总是先到达本侧的吸收节点
+    assert random_walk_controversy(graph, side, top_k=1) == pytest.approx(1.0, abs=1e-6)
+
+
+def test_rwc_bipartite_sides():
+    # 只有跨阵营的边：从1出发被0吸收的概率为1/3，RWC = (1/3)^2 - (2/3)^2
+    graph = _graph(4, [(0, 2), (0, 3), (1, 2), (1, 3)])
+    side = np.array([1, 1, -1, -1])
+    assert random_walk_controversy(graph, side, top_k=1, tol=1e-9) == pytest.approx(-1 / 3, abs=1e-6)
+
+
+def test_rwc_without_starting_nodes():
+    graph = _graph(2, [(0, 1)])
+    assert random_walk_controversy(graph, np.array([1, -1])) is None
+    assert random_walk_controversy(_graph(3, []), np.array([1, -1, 0])) is None
+
+
+def test_build_locks_are_released(tmp_path):
+    store = JsonStorage(str(tmp_path / "data"))
+    store.save_comments(1, [{"id": i, "userId": f"u{i % 5}", "replyTo": i - 1} for i in range(1, 50)])
+    set_storage(store)
+    try:
+        threads = [threading.Thread(target=service.get_event_graph, args=(1,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert service.get_event_graph(1).summary["nodeCount"] == 5
+        assert service._build_locks == {}
+    finally:
+        set_storage(None)
@@ -0,0 +1,233 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.jobs import (CANCELLED, COMPLETED, FAILED, QUEUED, RUNNING, JobQueue, JobStore, default_db_path,
+                      job_queue)
+from app.routers import jobs
+from app.storage import SqliteStorage, set_storage
+
+
+def test_default_db_path_follows_data_dir(monkeypatch, tmp_path):
+    monkeypatch.delenv("NETPOLAR_JOBS_DB", raising=False)
+    monkeypatch.setenv("NETPOLAR_DATA_DIR", str(tmp_path / "data"))
+    assert default_db_path() == os.path.join(str(tmp_path / "data"), "jobs.db")
+    monkeypatch.setenv("NETPOLAR_JOBS_DB", str(tmp_path / "custom.db"))
+    assert default_db_path() == str(tmp_path / "custom.db")
+
+
+def test_queue_store_is_created_in_data_dir(monkeypatch, tmp_path):
+    monkeypatch.delenv("NETPOLAR_JOBS_DB", raising=False)
+    monkeypatch.setenv("NETPOLAR_DATA_DIR", str(tmp_path))
+    queue = JobQueue()
+    assert queue.store.db_path == os.path.join(str(tmp_path), "jobs.db")
+    replacement = JobStore(str(tmp_path / "other.db"))
+    queue.set_store(replacement)
+    assert queue.store is replacement
+    replacement.close()
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=1)
+    yield queue
+    queue.stop()
+    queue.set_store(None)
+
+
+def _wait(queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job.status in (COMPLETED, FAILED, CANCELLED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"任务{job_id}未在{timeout}秒内结束")
+
+
+def _register_blocker(queue):
+    """注册占住工作线程的任务类型，返回 (已开始, 放行) 两个事件"""
+    started, release = threading.Event(), threading.Event()
+
+    @queue.register("block")
+    def block(params, context):
+        started.set()
+        while not release.wait(0.01):
+            context.progress(0.5)
+        return None
+
+    return started, release
+
+
+def test_priority_order(queue):
+    started, release = _register_blocker(queue)
+    order = []
+    queue.register("record")(lambda params, context: order.append(params["name"]))
+
+    blocker = queue.submit("block", {})
+    assert started.wait(5)
+    jobs = [queue.submit("record", {"name": name}, priority=priority)
+            for name, priority in (("low", 0), ("high", 5), ("low2", 0), ("mid", 1))]
+    release.set()
+    _wait(queue, blocker.job_id)
+    for job in jobs:
+        assert _wait(queue, job.job_id).status == COMPLETED
+    assert order == ["high", "mid", "low", "low2"]
+
+
+def test_concurrency_cap(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=4)
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    @queue.register("limited", concurrency=2)
+    def limited(params, context):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return params["n"]
+
+    try:
+        jobs = [queue.submit("limited", {"n": n}) for n in range(6)]
+        for job in jobs:
+            assert _wait(queue, job.job_id).status == COMPLETED
+        assert peak[0] == 2
+        assert [queue.result(job.job_id) for job in jobs] == list(range(6))
+    finally:
+        queue.stop()
+        queue.set_store(None)
+
+
+def test_cancel_queued_and_running(queue):
+    started, release = _register_blocker(queue)
+    ran = []
+    queue.register("record")(lambda params, context: ran.append(params))
+
+    running = queue.submit("block", {})
+    assert started.wait(5)
+    queued = queue.submit("record", {"name": "never"})
+    assert queue.cancel(queued.job_id).status == CANCELLED
+    queue.cancel(running.job_id)
+    assert _wait(queue, running.job_id).status == CANCELLED
+    assert queue.stats() == {QUEUED: 0, RUNNING: 0}
+    assert ran == []
+    # 已结束的任务不受取消影响
+    assert queue.cancel(running.job_id).status == CANCELLED
+
+
+def test_unfinished_jobs_recovered_on_start(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    queue = JobQueue(db_path, workers=1)
+    queue.register("echo")(lambda params, context: params["value"])
+    # 模拟上次运行时中断：一个执行中、一个排队中的任务
+    ids = []
+    for value, status in ((1, RUNNING), (2, QUEUED)):
+        params = {"value": value}
+        record = {"id": f"job-{value}", "kind": "echo", "params": params,
+                  "input_hash": queue.input_hash("echo", params), "priority": 0,
+                  "status": QUEUED, "progress": 0.0, "created_at": datetime.now()}
+        queue.store.insert(record)
+        queue.store.update(record["id"], status=status, progress=0.3)
+        ids.append(record["id"])
+    try:
+        queue.start()
+        for job_id, value in zip(ids, (1, 2)):
+            assert _wait(queue, job_id).status == COMPLETED
+            assert queue.result(job_id) == value
+    finally:
+        queue.stop()
+        queue.set_store(None)
+
+
+def test_stop_requeues_running_job(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    first = JobQueue(db_path, workers=1)
+    started, release = _register_blocker(first)
+    job = first.submit("block", {})
+    assert started.wait(5)
+    first.stop()
+    assert first.get(job.job_id).status == QUEUED
+    first.set_store(None)
+
+    second = JobQueue(db_path, workers=1)
+    second.register("block")(lambda params, context: "done")
+    try:
+        second.start()
+        assert _wait(second, job.job_id).status == COMPLETED
+        assert second.result(job.job_id) == "done"
+    finally:
+        second.stop()
+        second.set_store(None)
+
+
+def test_result_cache_by_hash_and_version(queue):
+    version = ["v1"]
+    calls = []
+
+    @queue.register("cached", version=lambda params: version[0])
+    def cached(params, context):
+        calls.append(params["x"])
+        return params["x"] * 2
+
+    first = queue.submit("cached", {"x": 1})
+    assert _wait(queue, first.job_id).status == COMPLETED
+    again = queue.submit("cached", {"x": 1})
+    assert again.cached and again.job_id == first.job_id
+    # 参数不同、强制重新执行或数据版本变化时不复用
+    other = queue.submit("cached", {"x": 2})
+    forced = queue.submit("cached", {"x": 1}, force=True)
+    version[0] = "v2"
+    changed = queue.submit("cached", {"x": 1})
+    for job in (other, forced, changed):
+        assert not job.cached
+        assert _wait(queue, job.job_id).status == COMPLETED
+    assert calls == [1, 2, 1, 1]
+    assert queue.result(changed.job_id) == 2
+
+
+def test_active_job_is_shared_and_ttl_expires(queue):
+    started, release = _register_blocker(queue)
+    queue.register("short", cache_ttl=0)(lambda params, context: None)
+
+    running = queue.submit("block", {})
+    assert started.wait(5)
+    duplicate = queue.submit("block", {})
+    assert duplicate.cached and duplicate.job_id == running.job_id
+    release.set()
+    _wait(queue, running.job_id)
+
+    first = queue.submit("short", {})
+    _wait(queue, first.job_id)
+    assert not queue.submit("short", {}).cached
+
+
+def test_related_index_cache_follows_events_version(tmp_path):
+    from app.routers import analysis  # noqa: F401  注册任务类型
+
+    store = SqliteStorage(str(tmp_path / "netpolar.db"))
+    store.insert_event({"title": "事件", "category": "社会", "polarizationLevel": 0.5})
+    set_storage(store)
+    try:
+        params = {"event_ids": None, "limit": 5}
+        before = job_queue.input_hash("related_index", params)
+        assert job_queue.input_hash("related_index", params) == before
+        store.update_event(1, {"title": "修改后的事件"})
+        assert job_queue.input_hash("related_index", params) != before
+    finally:
+        set_storage(None)
+
+
+@pytest.mark.parametrize("limit", [0, -1, 1001])
+def test_list_limit_out_of_range_is_rejected(limit):
+    app = FastAPI()
+    app.include_router(jobs.router, prefix="/api/jobs")
+    response = TestClient(app).get("/api/jobs/", params={"limit": limit})
+    assert response.status_code == 422
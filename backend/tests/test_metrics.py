@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+
+from app import metrics
+from app.metrics import Counter, Gauge, Histogram, Registry
+
+BURSTS = 30
+THREADS = 8
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # 测试指标注册到独立的注册表，不出现在 /metrics 中
+    registry = Registry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    return registry
+
+
+def _churn(func):
+    """模拟线程池回收后重新创建线程：每批启动新线程执行func并等待结束"""
+    for _ in range(BURSTS):
+        threads = [threading.Thread(target=func) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def test_counter_totals_across_thread_churn(registry):
+    counter = Counter("test_requests_total", "请求数", ("route",))
+    child = counter.labels("/a")
+
+    def work():
+        for _ in range(10):
+            child.inc()
+
+    _churn(work)
+    assert child.value == BURSTS * THREADS * 10
+    assert child._values._shards == []
+    child.inc(5)
+    assert child.value == BURSTS * THREADS * 10 + 5
+    assert len(child._values._shards) == 1
+
+
+def test_shards_bounded_without_scrapes(registry):
+    counter = Counter("test_unscraped_total", "未导出的计数")
+    _churn(counter.inc)
+    # 每个新线程注册分片时合并已结束线程的分片
+    assert len(counter.labels()._values._shards) <= THREADS
+    assert counter.labels().value == BURSTS * THREADS
+
+
+def test_histogram_totals_across_thread_churn(registry):
+    histogram = Histogram("test_latency_seconds", "延迟", buckets=(0.1, 1.0))
+
+    def work():
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5.0)
+
+    _churn(work)
+    counts, total, count = histogram.labels().snapshot()
+    n = BURSTS * THREADS
+    assert counts == [n, n, n]
+    assert count == 3 * n
+    assert total == pytest.approx(5.55 * n)
+
+
+def test_gauge_inc_and_dec_in_different_threads(registry):
+    gauge = Gauge("test_in_flight", "并发数")
+    _churn(gauge.inc)
+    _churn(gauge.dec)
+    gauge.inc()
+    assert gauge.labels().value == 1
+
+
+def test_exposition(registry):
+    counter = Counter("test_total", "计数", ("route", "status"))
+    counter.labels('/a"b', 200).inc(3)
+    gauge = Gauge("test_clients", "连接数", callback=lambda: {(): 2})
+    histogram = Histogram("test_seconds", "耗时", ("route",), buckets=(0.5, 0.1))
+    timer_child = histogram.labels("/a")
+    for value in (0.05, 0.3, 2.0):
+        timer_child.observe(value)
+
+    text = registry.exposition()
+    assert text == "\n".join([
+        "# HELP test_total 计数",
+        "# TYPE test_total counter",
+        'test_total{route="/a\\"b",status="200"} 3',
+        "# HELP test_clients 连接数",
+        "# TYPE test_clients gauge",
+        "test_clients 2",
+        "# HELP test_seconds 耗时",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_seconds_bucket{route="/a",le="0.5"} 2',
+        'test_seconds_bucket{route="/a",le="+Inf"} 3',
+        'test_seconds_sum{route="/a"} 2.35',
+        'test_seconds_count{route="/a"} 3',
+    ]) + "\n"
+    assert gauge.kind == "gauge"
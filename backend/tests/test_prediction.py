@@ -0,0 +1,48 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.jobs import JobCancelled
+from app.routers import prediction
+from app.routers.prediction import MAX_HORIZON, predict_polarization_index, prediction_job
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(prediction.router, prefix="/api/prediction")
+    # 不进入上下文，不触发启动事件
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("horizon", [0, MAX_HORIZON + 1])
+def test_prediction_horizon_out_of_range_is_rejected(client, horizon):
+    response = client.post("/api/prediction/prediction/polarization-index",
+                           json={"event_id": "stream-test", "prediction_horizon": horizon})
+    assert response.status_code == 422
+
+
+def test_prediction_reports_progress():
+    fractions = []
+    result = predict_polarization_index("progress-test", 8, 0.95, fractions.append)
+    assert len(result["predicted_values"]) == 9
+    assert fractions == [i / 8 for i in range(9)]
+
+
+class _CancelledContext:
+    def __init__(self, after):
+        self.calls = 0
+        self.after = after
+
+    def progress(self, fraction):
+        self.calls += 1
+        if self.calls > self.after:
+            raise JobCancelled()
+
+
+def test_prediction_job_stops_when_cancelled():
+    context = _CancelledContext(after=3)
+    with pytest.raises(JobCancelled):
+        prediction_job({"event_id": "progress-test", "prediction_horizon": MAX_HORIZON,
+                        "confidence_level": 0.95}, context)
+    assert context.calls == 4
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.testclient import TestClient
+
+from app.profiling import ProfiledRoute, _current_trace, instrument_app, sample_stacks, span
+from app.routers import admin
+
+
+def _load():
+    with span("storage.events"):
+        time.sleep(0.001)
+    return {"ok": True}
+
+
+@pytest.fixture
+def client():
+    router = APIRouter(route_class=ProfiledRoute)
+
+    @router.get("/items")
+    async def items():
+        # span需经由run_in_threadpool复制的上下文记录到当前请求
+        return await run_in_threadpool(_load)
+
+    app = FastAPI()
+    instrument_app(app)
+    app.include_router(router)
+    return TestClient(app)
+
+
+def _timings(response):
+    header = response.headers.get("server-timing")
+    if header is None:
+        return None
+    return {part.split(";")[0].strip(): float(part.split("dur=")[1]) for part in header.split(",")}
+
+
+def test_server_timing_with_profile_header(client):
+    timings = _timings(client.get("/items", headers={"X-Profile": "1"}))
+    assert set(timings) == {"storage-events", "endpoint", "serialization"}
+    assert timings["storage-events"] >= 1.0
+    assert timings["endpoint"] >= timings["storage-events"]
+
+
+def test_no_server_timing_without_header(client):
+    response = client.get("/items")
+    assert response.status_code == 200
+    assert _timings(response) is None
+
+
+def test_span_without_trace_is_noop():
+    assert _current_trace.get() is None
+    with span("storage.events") as s:
+        pass
+    assert s._trace is None
+
+
+def test_sample_stacks_sees_other_threads():
+    stop = threading.Event()
+
+    def idle_worker():
+        stop.wait()
+
+    thread = threading.Thread(target=idle_worker, name="sampled-thread")
+    thread.start()
+    try:
+        output = sample_stacks(0.05, 0.01)
+    finally:
+        stop.set()
+        thread.join()
+    lines = [line for line in output.splitlines() if line.startswith("sampled-thread;")]
+    assert lines and "idle_worker" in lines[0]
+    assert int(lines[0].rsplit(" ", 1)[1]) >= 1
+
+
+@pytest.fixture
+def admin_client():
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    return TestClient(app)
+
+
+def test_admin_disabled_by_default(admin_client, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_ENABLED", False)
+    assert admin_client.get("/api/admin/profiling/settings").status_code == 404
+    assert admin_client.post("/api/admin/profile", params={"seconds": 0.01}).status_code == 404
+
+
+def test_admin_allows_one_sampling_session(admin_client, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_ENABLED", True)
+    assert admin_client.get("/api/admin/profiling/settings").status_code == 200
+    assert admin_client.post("/api/admin/profile", params={"seconds": 0.01}).status_code == 200
+    with admin._sampling_lock:
+        response = admin_client.post("/api/admin/profile", params={"seconds": 0.01})
+    assert response.status_code == 409
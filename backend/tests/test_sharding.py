@@ -0,0 +1,105 @@
+from functools import reduce
+
+import pytest
+
+from app.sharding import shards
+from app.sharding.aggregate import TOP_K, aggregate_comments, empty_aggregate, merge_aggregates
+from app.storage import SqliteStorage, set_storage
+
+COMMENTS = [
+    {"id": i, "content": f"评论{i}", "sentiment": [0.9, -0.6, 0.1, "positive", None][i % 5]}
+    for i in range(3 * TOP_K)
+]
+
+
+def _shards(sizes):
+    shards, start = [], 0
+    for size in sizes:
+        shards.append(aggregate_comments(COMMENTS[start:start + size]))
+        start += size
+    return shards
+
+
+def _assert_same(left, right):
+    sums_left = left.pop("polarizationSums")
+    sums_right = right.pop("polarizationSums")
+    assert sums_left == pytest.approx(sums_right)
+    assert left == right
+
+
+def test_merge_is_associative():
+    a, b, c = _shards([TOP_K // 2, TOP_K + 7, TOP_K])
+    _assert_same(merge_aggregates(merge_aggregates(a, b), c),
+                 merge_aggregates(a, merge_aggregates(b, c)))
+
+
+def test_merge_matches_single_aggregate():
+    parts = _shards([TOP_K, TOP_K, TOP_K])
+    _assert_same(reduce(merge_aggregates, parts, empty_aggregate()), aggregate_comments(COMMENTS))
+
+
+def test_empty_aggregate_is_identity():
+    (a,) = _shards([TOP_K + 3])
+    _assert_same(merge_aggregates(empty_aggregate(), a), dict(a))
+    _assert_same(merge_aggregates(a, empty_aggregate()), dict(a))
+
+
+@pytest.fixture
+def sharded(tmp_path, monkeypatch):
+    monkeypatch.setenv("NETPOLAR_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(shards, "SHARD_SIZE", 10)
+    monkeypatch.setattr(shards, "SHARD_WORKERS", 0)
+    store = SqliteStorage(str(tmp_path / "netpolar.db"))
+    set_storage(store)
+    shards._merged_cache.clear()
+    yield store
+    set_storage(None)
+    shards._merged_cache.clear()
+
+
+def _analyze(store, comments):
+    store.save_comments(1, comments)
+    result = shards.analyze_event_comments(1)
+    expected = aggregate_comments(comments)
+    assert result["count"] == expected["count"]
+    assert result["sentimentCounts"] == expected["sentimentCounts"]
+    assert result["topicCounts"] == expected["topicCounts"]
+    assert result["head"] == expected["head"]
+    return result["shardCount"], result["recomputedShards"]
+
+
+def test_cache_hit_recomputes_nothing(sharded):
+    assert _analyze(sharded, COMMENTS[:35]) == (4, 4)
+    assert shards.analyze_event_comments(1)["recomputedShards"] == 0
+    assert shards._event_locks == {}
+
+
+def test_append_and_edit_recompute_one_shard(sharded):
+    comments = COMMENTS[:35]
+    _analyze(sharded, comments)
+    # 追加到未满的最后一个分片
+    comments = comments + COMMENTS[35:40]
+    assert _analyze(sharded, comments) == (4, 1)
+    # 追加产生新分片
+    comments = comments + COMMENTS[40:45]
+    assert _analyze(sharded, comments) == (5, 1)
+    # 修改中间一条评论
+    comments = list(comments)
+    comments[15] = dict(comments[15], content="修改后的评论", sentiment="negative")
+    assert _analyze(sharded, comments) == (5, 1)
+
+
+def test_insert_at_front_invalidates_shifted_shards(sharded):
+    comments = COMMENTS[1:31]
+    _analyze(sharded, comments)
+    # 头部插入使每个分片的内容都发生移动
+    assert _analyze(sharded, COMMENTS[:1] + comments) == (4, 4)
+    assert _analyze(sharded, comments) == (3, 3)
+
+
+def test_merged_cache_is_bounded(sharded, monkeypatch):
+    monkeypatch.setattr(shards, "CACHE_SIZE", 2)
+    for event_id in range(1, 5):
+        sharded.save_comments(event_id, COMMENTS[:5])
+        shards.analyze_event_comments(event_id)
+    assert list(shards._merged_cache) == [3, 4]
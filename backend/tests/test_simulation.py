@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.routers import prediction
+from app.routers.prediction import SimulationRequest
+from app.simulation import PRESET_SCENARIOS, Scenario, SimulationParams, engine, run_scenarios
+from app.simulation.dynamics import bounded_confidence_step, degroot_step, initial_opinions
+
+# 两个阵营的评论立场
+STANCES = np.array([-0.9, -0.8, -0.6, 0.5, 0.7, 0.9])
+
+
+def _opinions(trajectories=20, agents=50, seed=0):
+    rng = np.random.default_rng(seed)
+    x = initial_opinions(STANCES, trajectories, agents, rng)
+    return x, (x < 0).sum(axis=1), rng
+
+
+def test_degroot_full_homophily_keeps_sides_apart():
+    x, n_negative, rng = _opinions()
+    updated = degroot_step(x, n_negative, rng, mixing=1.0, neighbors=4, homophily=1.0)
+    negative = np.arange(x.shape[1]) < n_negative[:, None]
+    assert (updated[negative] < 0).all()
+    assert (updated[~negative] > 0).all()
+
+
+def test_degroot_mixing_converges_to_consensus():
+    x, n_negative, rng = _opinions()
+    start = x.var(axis=1)
+    for _ in range(30):
+        x = degroot_step(x, n_negative, rng, mixing=0.5, neighbors=4, homophily=0.0)
+    assert (x.var(axis=1) < 0.01 * start).all()
+
+
+def test_bounded_confidence_conserves_mean():
+    x, _, rng = _opinions()
+    updated = bounded_confidence_step(x, rng, mixing=0.5, confidence_bound=1.0)
+    assert updated.mean(axis=1) == pytest.approx(x.mean(axis=1))
+    assert not np.array_equal(updated, x)
+
+
+def test_bounded_confidence_ignores_distant_opinions():
+    x, _, rng = _opinions()
+    # 最小的同侧观点差为0，但只有差值严格小于阈值才互动
+    updated = bounded_confidence_step(x, rng, mixing=0.5, confidence_bound=1e-12)
+    assert np.array_equal(updated, x)
+
+
+@pytest.mark.parametrize("model", ["degroot", "bounded_confidence"])
+def test_run_scenarios(monkeypatch, model):
+    monkeypatch.setattr(engine, "SIMULATION_WORKERS", 0)
+    monkeypatch.setattr(engine, "BATCH_SIZE", 10)
+    params = SimulationParams(model=model, agents=40, trajectories=25, horizon=6, seed=1)
+    scenarios = [PRESET_SCENARIOS["baseline"], Scenario(name="baseline-copy"), PRESET_SCENARIOS["moderation"]]
+    calls = []
+    result = run_scenarios(STANCES, params, scenarios, threshold=0.5,
+                           progress=lambda done, total: calls.append((done, total)))
+
+    assert calls[-1] == (9, 9)
+    assert [s["scenario"]["name"] for s in result["scenarios"]] == ["baseline", "baseline-copy", "moderation"]
+    baseline, copy, moderation = result["scenarios"]
+    assert len(baseline["forecast"]) == params.horizon + 1
+    assert baseline["forecast"][0]["mean"] == pytest.approx(result["initial_pi"])
+    quantiles = list(baseline["final"]["quantiles"].values())
+    assert quantiles == sorted(quantiles)
+    assert sum(baseline["final"]["histogram"]["counts"]) == params.trajectories
+    assert "effect_vs_control" not in baseline
+    # 公共随机数：与对照相同的情景没有差异
+    assert copy["effect_vs_control"]["mean"] == 0.0
+    assert copy["final"] == baseline["final"]
+    assert moderation["effect_vs_control"]["mean"] < 0
+    # 相同种子结果可复现
+    again = run_scenarios(STANCES, params, scenarios[:1], threshold=0.5)
+    assert again["scenarios"][0]["final"] == baseline["final"]
+
+
+@pytest.mark.parametrize("field, value", [
+    ("horizon", 0), ("horizon", engine.MAX_HORIZON + 1),
+    ("rounds_per_hour", 0), ("rounds_per_hour", engine.MAX_ROUNDS_PER_HOUR + 1),
+    ("neighbors", 0), ("neighbors", engine.MAX_NEIGHBORS + 1),
+    ("confidence_bound", 0), ("confidence_bound", -3), ("confidence_bound", 1.5),
+    ("noise", -0.1), ("mixing", 2),
+])
+def test_params_out_of_range(field, value):
+    with pytest.raises(ValidationError):
+        SimulationParams(**{field: value})
+
+
+def test_params_workload_is_bounded():
+    SimulationParams(agents=5000, horizon=400, rounds_per_hour=1, trajectories=100)
+    with pytest.raises(ValidationError):
+        SimulationParams(agents=5000, horizon=401, rounds_per_hour=1, trajectories=100)
+    with pytest.raises(ValidationError):
+        SimulationParams(agents=1000, horizon=100, rounds_per_hour=60)
+    with pytest.raises(ValidationError):
+        SimulationParams(trajectories=50000, horizon=100)
+
+
+def test_request_threshold_and_scenarios():
+    SimulationRequest(event_id=1, threshold=0, scenarios=[{"name": "late", "start_hour": 24}])
+    with pytest.raises(ValidationError):
+        SimulationRequest(event_id=1, threshold=7)
+    with pytest.raises(ValidationError):
+        SimulationRequest(event_id=1, threshold=-0.1)
+    with pytest.raises(ValidationError):
+        SimulationRequest(event_id=1, scenarios=[{"name": "late", "start_hour": 25}])
+    with pytest.raises(ValidationError):
+        SimulationRequest(event_id=1, scenarios=["baseline"] * (prediction.MAX_SCENARIOS + 1))
+
+
+def test_oversized_simulation_is_rejected():
+    app = FastAPI()
+    app.include_router(prediction.router, prefix="/api/prediction")
+    client = TestClient(app)
+    response = client.post("/api/prediction/prediction/simulation", json={
+        "event_id": 1, "horizon": 10 ** 6, "rounds_per_hour": 1000, "neighbors": 10 ** 6,
+        "confidence_bound": -3, "threshold": 7,
+    })
+    assert response.status_code == 422
+    fields = {error["loc"][-1] for error in response.json()["detail"]}
+    assert {"horizon", "rounds_per_hour", "neighbors", "confidence_bound", "threshold"} <= fields
@@ -0,0 +1,176 @@
+import itertools
+import os
+
+import pytest
+
+from app.storage import JsonStorage, SqliteStorage
+from app.storage.base import match_event
+from app.storage.migrate import migrate
+
+EVENTS = [
+    {"id": i, "title": title, "category": category, "date": "2025-04-25", "source": "知乎",
+     "commentCount": 0, "polarizationLevel": level, "hotLevel": 5.0,
+     "description": description, "keywords": keywords}
+    for i, (title, category, level, description, keywords) in enumerate([
+        ("某科技公司CEO涉嫌违规交易", "科技", 8.7, "企业道德与监管", ["监管", "CEO"]),
+        ("新冠疫苗接种争议", "医疗", 7.5, "公共健康讨论", ["疫苗"]),
+        ("AI Regulation Debate", "科技", 3.0, None, ["AI", "Policy"]),
+        ("教育公平讨论", "教育", 5.0, "高考改革", []),
+        ("房价调控政策", "经济", 6.2, "楼市 监管", None),
+    ], start=1)
+]
+
+FILTERS = {
+    "category": [None, "科技", "医疗", "不存在"],
+    "min_polarization": [None, 5.0, 8.7],
+    "max_polarization": [None, 5.0, 7.5],
+    "keyword": [None, "监管", "ai", "POLICY", "高考"],
+}
+
+
+@pytest.fixture
+def backends(tmp_path):
+    json_store = JsonStorage(str(tmp_path / "data"))
+    sqlite_store = SqliteStorage(str(tmp_path / "netpolar.db"))
+    for store in (json_store, sqlite_store):
+        store.save_events(EVENTS)
+    yield json_store, sqlite_store
+    sqlite_store.close()
+
+
+def test_query_events_matches_in_memory_filter(backends):
+    json_store, sqlite_store = backends
+    for values in itertools.product(*FILTERS.values()):
+        kwargs = dict(zip(FILTERS, values))
+        expected = [e for e in EVENTS if match_event(e, **kwargs)]
+        assert json_store.query_events(**kwargs) == expected, kwargs
+        assert sqlite_store.query_events(**kwargs) == expected, kwargs
+
+
+def test_query_events_pagination(backends):
+    json_store, sqlite_store = backends
+    for skip, limit in [(0, 2), (2, 2), (4, 10), (10, 5)]:
+        expected = EVENTS[skip:skip + limit]
+        assert json_store.query_events(skip=skip, limit=limit) == expected
+        assert sqlite_store.query_events(skip=skip, limit=limit) == expected
+
+
+def test_is_initialized(tmp_path):
+    json_store = JsonStorage(str(tmp_path / "data"))
+    sqlite_store = SqliteStorage(str(tmp_path / "netpolar.db"))
+    try:
+        for store in (json_store, sqlite_store):
+            assert not store.is_initialized()
+            store.save_events([])
+            assert store.is_initialized()
+            assert store.load_events() == []
+    finally:
+        sqlite_store.close()
+
+
+def test_corrupt_events_file_counts_as_initialized(tmp_path):
+    store = JsonStorage(str(tmp_path / "data"))
+    store.save_events(EVENTS)
+    path = tmp_path / "data" / "events" / "events.json"
+    path.write_text(path.read_text(encoding="utf-8")[:50], encoding="utf-8")
+    assert store.load_events() == []
+    assert store.is_initialized()
+
+
+def test_single_event_operations(backends):
+    for store in backends:
+        assert store.get_event(2) == EVENTS[1]
+        assert store.get_event(99) is None
+
+        created = store.insert_event(dict(EVENTS[0], title="新事件", category="社会"))
+        assert created["id"] == len(EVENTS) + 1
+        assert store.get_event(created["id"]) == created
+        assert store.query_events(category="社会") == [created]
+
+        updated = store.update_event(1, {"category": "社会", "keywords": ["新关键词"]})
+        assert updated == dict(EVENTS[0], category="社会", keywords=["新关键词"])
+        assert store.query_events(keyword="新关键词") == [updated]
+        assert store.update_event(99, {"title": "x"}) is None
+
+        assert store.delete_event(3)
+        assert not store.delete_event(3)
+        assert [e["id"] for e in store.load_events()] == [1, 2, 4, 5, created["id"]]
+
+
+def test_comments_version_differs_after_recreating_db(tmp_path):
+    path = str(tmp_path / "netpolar.db")
+    store = SqliteStorage(path)
+    store.save_comments(1, [{"id": 1}])
+    version = store.comments_version(1)
+    store.close()
+
+    reopened = SqliteStorage(path)
+    assert reopened.comments_version(1) == version
+    reopened.close()
+
+    os.remove(path)
+    recreated = SqliteStorage(path)
+    recreated.save_comments(1, [{"id": 2}])
+    assert recreated.comments_version(1) != version
+    recreated.close()
+
+
+def test_migrate(tmp_path):
+    source = JsonStorage(str(tmp_path / "data"))
+    source.save_events(EVENTS)
+    source.save_comments(1, [{"id": 1, "content": "评论"}, {"id": 2, "content": "回复"}])
+    source.save_comments(3, [])
+    source.save_analysis(1, {"polarizationScore": 0.5})
+    source.save_related(2, {"relatedEvents": [1]})
+
+    db_path = str(tmp_path / "netpolar.db")
+    stats = migrate(str(tmp_path / "data"), db_path)
+    assert stats == {"events": len(EVENTS), "comments": 2, "results": 1, "related": 1}
+
+    target = SqliteStorage(db_path)
+    try:
+        assert target.load_events() == EVENTS
+        assert target.load_comments(1) == source.load_comments(1)
+        assert target.load_comments(3) == []
+        assert target.load_comments(2) is None
+        assert target.load_analysis(1) == {"polarizationScore": 0.5}
+        assert target.load_related(2) == {"relatedEvents": [1]}
+    finally:
+        target.close()
+
+
+def test_negative_pagination_is_rejected():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.routers import events
+
+    app = FastAPI()
+    app.include_router(events.router, prefix="/api/events")
+    client = TestClient(app)
+    assert client.get("/api/events/", params={"limit": -1}).status_code == 422
+    assert client.get("/api/events/", params={"skip": -1}).status_code == 422
+
+
+def test_events_version_changes_on_every_write(tmp_path):
+    json_store = JsonStorage(str(tmp_path / "data"))
+    sqlite_store = SqliteStorage(str(tmp_path / "netpolar.db"))
+    try:
+        for store in (json_store, sqlite_store):
+            assert store.events_version() is None
+            store.save_events(EVENTS)
+            versions = [store.events_version()]
+            created = store.insert_event(dict(EVENTS[0], title="新事件"))
+            versions.append(store.events_version())
+            store.delete_event(created["id"])
+            versions.append(store.events_version())
+            assert len(set(versions)) == 3
+            assert store.events_version() == versions[-1]
+
+        version = sqlite_store.events_version()
+        sqlite_store.update_event(1, {"category": "社会"})
+        assert sqlite_store.events_version() != version
+        version = sqlite_store.events_version()
+        sqlite_store.delete_event(99)
+        assert sqlite_store.events_version() == version
+    finally:
+        sqlite_store.close()
@@ -0,0 +1,121 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.graph.builder import comment_stance
+from app.routers import monitor, prediction
+from app.streaming import ALL_EVENTS, ALL_PLATFORMS, StreamingPolarizationEstimator
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # 路由使用独立的估计器，不影响全局状态
+    fresh = StreamingPolarizationEstimator()
+    monkeypatch.setattr(monitor, "estimator", fresh)
+    monkeypatch.setattr(prediction, "estimator", fresh)
+    app = FastAPI()
+    app.include_router(monitor.router, prefix="/api/monitor")
+    app.include_router(prediction.router, prefix="/api/prediction")
+    # 不进入上下文，不触发启动事件
+    return TestClient(app)
+
+
+def test_comment_stance_falls_back_to_sentiment():
+    assert comment_stance({"stance": None, "sentiment": "positive"}) == 1.0
+    assert comment_stance({"stance": -0.4, "sentiment": "positive"}) == -0.4
+    assert comment_stance({"stance": None, "sentiment": None}) is None
+
+
+def test_ingest_sentiment_only_comment(client):
+    response = client.post("/api/monitor/monitor/stream/comments", json=[
+        {"event_id": "stream-test", "platform": "weibo", "sentiment": "positive"},
+        {"event_id": "stream-test", "platform": "weibo"},
+    ])
+    assert response.status_code == 200
+    assert response.json() == {"accepted": 1, "rejected": 1}
+    assert client.get("/api/monitor/monitor/stream/stream-test").status_code == 200
+
+
+@pytest.mark.parametrize("confidence", [0, 1, 1.5, -0.2])
+def test_confidence_out_of_range_is_rejected(client, confidence):
+    monitor.estimator.update("stream-test", "weibo", 0.5)
+    response = client.get("/api/monitor/monitor/stream/stream-test", params={"confidence": confidence})
+    assert response.status_code == 422
+    response = client.post("/api/prediction/prediction/polarization-index",
+                           json={"event_id": "stream-test", "confidence_level": confidence})
+    assert response.status_code == 422
+
+
+def _decayed(est, event_id="1", platform="weibo", now=None):
+    return est.snapshot(event_id, platform, now=now)["decayed"]
+
+
+def test_decay_halves_older_weight():
+    est = StreamingPolarizationEstimator(half_life=100.0)
+    est.update("1", "weibo", 1.0, timestamp=0.0)
+    est.update("1", "weibo", -1.0, timestamp=100.0)
+    decayed = _decayed(est, now=100.0)
+    # 权重 0.5 和 1：均值 -1/3，方差 1 - 1/9
+    assert decayed["mean_stance"] == pytest.approx(-1 / 3)
+    assert decayed["pi"] == pytest.approx(8 / 9)
+    assert decayed["effective_n"] == pytest.approx(1.5 ** 2 / 1.25)
+    # 读取推进衰减时钟，但不改变比例
+    assert _decayed(est, now=400.0)["pi"] == pytest.approx(8 / 9)
+
+
+def test_late_comment_is_decayed_like_in_order():
+    in_order = StreamingPolarizationEstimator(half_life=100.0)
+    in_order.update("1", "weibo", 1.0, timestamp=0.0)
+    in_order.update("1", "weibo", -1.0, timestamp=100.0)
+    late = StreamingPolarizationEstimator(half_life=100.0)
+    late.update("1", "weibo", -1.0, timestamp=100.0)
+    late.update("1", "weibo", 1.0, timestamp=0.0)
+    for key in ("pi", "mean_stance", "effective_n"):
+        assert _decayed(late, now=100.0)[key] == pytest.approx(_decayed(in_order, now=100.0)[key])
+
+
+def test_last_update_is_last_comment_time():
+    est = StreamingPolarizationEstimator()
+    est.update("1", "weibo", 0.5, timestamp=1000.0)
+    est.update("1", "weibo", 0.5, timestamp=1019.0)
+    est.update("1", "weibo", 0.5, timestamp=1010.0)
+    assert est.snapshot("1", "weibo", now=2000.0)["last_update"] == 1019.0
+    assert est.snapshot("1", "weibo", now=3000.0)["last_update"] == 1019.0
+
+
+def test_window_keeps_time_order():
+    est = StreamingPolarizationEstimator(window_seconds=100.0)
+    est.update("1", "weibo", 1.0, timestamp=0.0)
+    est.update("1", "weibo", -1.0, timestamp=50.0)
+    est.update("1", "weibo", 1.0, timestamp=10.0)
+    # t=105 时只淘汰t=0的评论，晚到的t=10评论仍在窗口中
+    window = est.snapshot("1", "weibo", now=105.0)["window"]
+    assert window["effective_n"] == pytest.approx(2)
+    assert window["mean_stance"] == pytest.approx(0.0)
+    assert window["pi"] == pytest.approx(1.0)
+
+    # 早于窗口的晚到评论不进入窗口，只计入衰减统计
+    est.update("1", "weibo", 1.0, timestamp=200.0)
+    est.update("1", "weibo", -1.0, timestamp=20.0)
+    snapshot = est.snapshot("1", "weibo", now=200.0)
+    assert snapshot["window"]["effective_n"] == pytest.approx(1)
+    assert snapshot["count"] == 5
+
+
+def test_window_size_evicts_oldest():
+    est = StreamingPolarizationEstimator(window_size=2)
+    for ts, stance in [(0.0, 1.0), (2.0, -1.0), (1.0, 0.5)]:
+        est.update("1", "weibo", stance, timestamp=ts)
+    window = est.snapshot("1", "weibo", now=2.0)["window"]
+    assert window["mean_stance"] == pytest.approx(-0.25)
+
+
+def test_idle_series_expire():
+    est = StreamingPolarizationEstimator(series_ttl=100.0)
+    est.update("old", "weibo", 0.5, timestamp=0.0)
+    est.update("new", "douyin", 0.5, timestamp=150.0)
+    assert not est.has_data("old", "weibo")
+    assert not est.has_data("old", ALL_PLATFORMS)
+    assert not est.has_data(ALL_EVENTS, "weibo")
+    assert est.has_data("new", "douyin")
+    assert est.has_data(ALL_EVENTS, ALL_PLATFORMS)